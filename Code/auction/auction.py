@@ -1,14 +1,85 @@
 import math
 import csv
+import copy
 import statistics
 import os.path
 import time
-import gurobipy
+import itertools
+import concurrent.futures
+import contextlib
+import io
 import numpy as np
+import scipy.optimize
+import scipy.sparse
 from argparse import ArgumentParser
-import uuid
+import json
+import hashlib
+import sys
+
+if __package__ in (None, ""):
+    # run as a script, the storage package sits next to the auction package
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.cache import getFileKey
+from storage.cache import openCache
+from storage.cache import saveArray
+from storage.cache import commitCache
 
 EPSILON = 0.00001
+
+# Profile of the iteration running in this process, None unless profiling is enabled
+current_profile = None
+
+# Phase returned while profiling is disabled, entering it does nothing
+NO_PHASE = contextlib.nullcontext()
+
+
+class Profile(object):
+    """Durations and call counts of the phases of one iteration, the size and result of every MIP it solved, and the
+    revenue of its allocation with the upper bound the backend proved for it.
+
+    Phases nest, each one is recorded under the path of the phases it runs in, e.g. "allocation/solve".
+    """
+    def __init__(self):
+        self.phases = {}
+        self.mips = []
+        self.allocation = None
+        self.path = []
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        self.path.append(name)
+        key = "/".join(self.path)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            phase = self.phases.setdefault(key, {"calls": 0, "seconds": 0.0})
+            phase["calls"] += 1
+            phase["seconds"] += time.perf_counter() - start
+            self.path.pop()
+
+    def addMip(self, backend, variables, constraints, nonzeros, nodes, gap):
+        self.mips.append({"phase": "/".join(self.path), "backend": backend, "variables": int(variables), "constraints": int(constraints),
+                          "nonzeros": int(nonzeros), "nodes": None if nodes is None else int(nodes), "gap": None if gap is None else float(gap)})
+
+    def setAllocation(self, revenue, upper_bound):
+        self.allocation = {"revenue": float(revenue), "upper_bound": None if upper_bound is None else float(upper_bound),
+                           "gap": None if upper_bound is None else float(getGap(revenue, upper_bound))}
+
+    def trace(self):
+        return {"phases": self.phases, "mips": self.mips, "allocation": self.allocation}
+
+
+def getGap(revenue, upper_bound):
+    # relative gap of a revenue to an upper bound on it
+    return 0 if upper_bound <= 0 else (upper_bound - revenue) / upper_bound
+
+
+def profilePhase(name):
+    if current_profile is None:
+        return NO_PHASE
+    return current_profile.phase(name)
     
 
 #%%
@@ -24,51 +95,104 @@ def getSpread(element):
     return element[0]
 
 
-def maximizeGroupRevenue(advertisers_list, weighted, extended, approximation_tolerance):
+def maximizeGroupRevenue(advertisers_list, weighted, extended, approximation_tolerance, backend):
     if extended:
-        return maximizeGroupRevenueExtended(advertisers_list, weighted, approximation_tolerance)
+        return maximizeGroupRevenueExtended(advertisers_list, weighted, approximation_tolerance, backend)
     elif weighted:
         return maximizeGroupRevenueWeighted(advertisers_list)
     else:
         return maximizeGroupRevenueUnweighted(advertisers_list)
 
 
+def sortAdvertisers(advertisers_list, weighted):
+    """Return the advertisers sorted by value (weighted) or value per engagement, highest first.
+
+    Equal keys keep their order in advertisers_list, like list.sort(reverse=True). Advertisers of
+    one dataset are filtered from its presorted order in linear time instead of being sorted.
+    """
+    if weighted:
+        key = getValue
+    else:
+        key = getValuePerEngagement
+
+    dataset = advertisers_list[0].dataset if len(advertisers_list) > 0 else None
+    by_index = {advertiser.index: advertiser for advertiser in advertisers_list}
+    if dataset is None or len(by_index) < len(advertisers_list) or any(advertiser.dataset is not dataset for advertiser in advertisers_list):
+        return sorted(advertisers_list, key=key, reverse=True)
+
+    order, keys = dataset.sortedOrder(weighted)
+    selected = np.zeros(len(order), dtype=bool)
+    selected[list(by_index.keys())] = True
+    indices = order[selected[order]]
+    sorted_list = [by_index[index] for index in indices.tolist()]
+
+    # the presorted order breaks ties by dataset index, restore the list order within ties
+    sorted_keys = keys[indices]
+    if (sorted_keys[1:] == sorted_keys[:-1]).any():
+        position = {advertiser.index: list_position for list_position, advertiser in enumerate(advertisers_list)}
+        start = 0
+        for end in range(1, len(sorted_list) + 1):
+            if end == len(sorted_list) or sorted_keys[end] != sorted_keys[start]:
+                sorted_list[start:end] = sorted(sorted_list[start:end], key=lambda advertiser: position[advertiser.index])
+                start = end
+
+    return sorted_list
+
+
+def getPrefixSums(values):
+    # prefix sums added one after the other, so they equal a running total in a loop
+    prefix_sums = np.zeros(len(values) + 1)
+    np.cumsum(values, out=prefix_sums[1:])
+    return prefix_sums
+
+
 def maximizeGroupRevenueWeighted(advertisers_list):
 
-    advertisers_list.sort(key=getValue, reverse=True)
+    advertisers_list[:] = sortAdvertisers(advertisers_list, True)
 
-    index = 0
-    total_budget = 0
+    values = np.array([advertiser.value() for advertiser in advertisers_list])
+    budgets = getPrefixSums([advertiser.budget for advertiser in advertisers_list])
 
-    while index < len(advertisers_list) and total_budget < advertisers_list[index].value() / 2.0:
-        index += 1
-        total_budget += advertisers_list[index-1].budget
+    # the first index whose value is covered twice by the budgets of the advertisers before it
+    stopped = budgets[:-1] >= values / 2.0
+    index = int(np.argmax(stopped)) if stopped.any() else len(advertisers_list)
 
     return_index = max(index - 1, 0)
 
     return advertisers_list[return_index].value_per_engagement, advertisers_list[return_index].value()
 
 
-def maximizeGroupRevenueExtended(advertisers_list, weighted, approximation_tolerance):
+def maximizeGroupRevenueExtended(advertisers_list, weighted, approximation_tolerance, backend):
+
+    # a stable sort places the duplicates of a run of equal keys right after the run
+    double_advertisers_list = []
+    key = getValue if weighted else getValuePerEngagement
+    sorted_list = sortAdvertisers(advertisers_list, weighted)
+    start = 0
+    for end in range(1, len(sorted_list) + 1):
+        if end == len(sorted_list) or key(sorted_list[end]) != key(sorted_list[start]):
+            double_advertisers_list += sorted_list[start:end]
+            double_advertisers_list += [advertiser.duplicate() for advertiser in sorted_list[start:end]]
+            start = end
 
-    double_advertisers_list = list(advertisers_list)
-    # duplicate
-    for advertiser in advertisers_list:
-        double_advertisers_list.append(Advertiser(advertiser.value_per_engagement, advertiser.budget, dict(advertiser.spread_dict)))
+    # every prefix is priced truthfully against the reserve of its last advertiser
+    price_table = PriceTable(double_advertisers_list, [], weighted, False)
 
     if weighted:
-        double_advertisers_list.sort(key=getValue, reverse=True)
+        reserves = price_table.values().tolist()
     else:
-        double_advertisers_list.sort(key=getValuePerEngagement, reverse=True)
+        reserves = price_table.values_per_engagement.tolist()
+    prefix_solver = backend.prefixSolver(price_table, approximation_tolerance)
 
     max_index = 0
     max_revenue = 0
-    
+
     for index in range(1, len(double_advertisers_list), 2):
 
         revenue = 0
-        
-        revenue, _ = allocateExtended(double_advertisers_list[:(index+1)], [], 0, double_advertisers_list[index].value_per_engagement, 0, double_advertisers_list[index].value(), weighted, False, approximation_tolerance)
+
+        price_table.setReserves(0, price_table.values_per_engagement[index], 0, reserves[index])
+        revenue = prefix_solver.solve(index + 1, reserves[index])
 
         if revenue > max_revenue:
             max_revenue = revenue
@@ -79,16 +203,17 @@ def maximizeGroupRevenueExtended(advertisers_list, weighted, approximation_toler
 
 def maximizeGroupRevenueUnweighted(advertisers_list):
 
-    advertisers_list.sort(key=getValuePerEngagement, reverse=True)
+    advertisers_list[:] = sortAdvertisers(advertisers_list, False)
 
-    index = 0
-    total_budget = 0
-    half_spread = sum([sum(advertisers_list[i].spread_dict.values()) for i in range(0, index + 1)]) / (2.0*(index + 1))
-    
-    while index < len(advertisers_list) - 1 and total_budget < advertisers_list[index].value_per_engagement * half_spread:
-        index += 1
-        total_budget += advertisers_list[index-1].budget
-        half_spread = sum([sum(advertisers_list[i].spread_dict.values()) for i in range(0, index + 1)]) / (2.0*(index + 1))
+    values_per_engagement = np.array([advertiser.value_per_engagement for advertiser in advertisers_list])
+    budgets = getPrefixSums([advertiser.budget for advertiser in advertisers_list])
+    spreads = getPrefixSums([advertiser.totalSpread() for advertiser in advertisers_list])
+
+    # the mean spread of the first index + 1 advertisers, halved
+    half_spreads = spreads[1:] / (2.0 * np.arange(1, len(advertisers_list) + 1))
+    stopped = budgets[:-1] >= values_per_engagement * half_spreads
+    stopped[-1:] = True
+    index = int(np.argmax(stopped))
 
     return_index = max(index - 1, 0)
 
@@ -96,7 +221,7 @@ def maximizeGroupRevenueUnweighted(advertisers_list):
 
 
 def getPrice(advertiser, value_a, value_b, value_per_engagement_a, value_per_engagement_b, advertisers_a, advertisers_b, weighted, non_truthful):
-    total_spread = sum(advertiser.spread_dict.values())
+    total_spread = advertiser.totalSpread()
     
     price = 0
     
@@ -127,141 +252,575 @@ def getPrice(advertiser, value_a, value_b, value_per_engagement_a, value_per_eng
     return price
 
 
-def allocate(advertisers_a, advertisers_b, value_per_engagement_a, value_per_engagement_b, value_a, value_b, weighted, extended, non_truthful, approximation_tolerance, allocation_random_state):
+class PriceTable(object):
+    """Group, total spread, price and eligibility of every advertiser of one group split.
+
+    The rows follow advertisers_a + advertisers_b. The table is built once per split and repriced
+    with setReserves, which computes the prices of all advertisers in one vectorized pass with the
+    same rules as getPrice.
+    """
+    def __init__(self, advertisers_a, advertisers_b, weighted, non_truthful):
+        self.advertisers = advertisers_a + advertisers_b
+        self.weighted = weighted
+        self.non_truthful = non_truthful
+        self.in_group_a = np.arange(len(self.advertisers)) < len(advertisers_a)
+        self.values_per_engagement = np.array([advertiser.value_per_engagement for advertiser in self.advertisers], dtype=np.float64)
+        self.budgets = np.array([advertiser.budget for advertiser in self.advertisers], dtype=np.float64)
+
+        if len(self.advertisers) > 0:
+            self.spreads, self.seeders = getSpreadMatrix(self.advertisers)
+        else:
+            self.spreads, self.seeders = np.zeros((0, 0)), []
+        self.total_spreads = np.array([advertiser.totalSpread() for advertiser in self.advertisers], dtype=np.float64)
+
+        self.setReserves(0, 0, 0, 0)
+
+    def setReserves(self, value_per_engagement_a, value_per_engagement_b, value_a, value_b):
+        if self.non_truthful:  # non-truthful auction is deriving the price from the same group
+            reserve_a = (value_per_engagement_a, value_a)
+            reserve_b = (value_per_engagement_b, value_b)
+        else:  # truthful auction is deriving the price from the other group
+            reserve_a = (value_per_engagement_b, value_b)
+            reserve_b = (value_per_engagement_a, value_a)
+
+        has_spread = self.total_spreads > 0
+        if self.weighted:
+            reserves = np.where(self.in_group_a, reserve_a[1], reserve_b[1]).astype(np.float64)
+            self.prices = np.divide(reserves, self.total_spreads, out=np.zeros(len(self.advertisers)), where=has_spread)
+        else:
+            reserves = np.where(self.in_group_a, reserve_a[0], reserve_b[0]).astype(np.float64)
+            self.prices = np.where(has_spread, reserves, 0.0)
+
+        self.eligible = self.prices <= self.values_per_engagement + EPSILON
+
+    def values(self):
+        return self.values_per_engagement * self.total_spreads
+
+    def prefix(self, size):
+        """Return the table restricted to its first size rows, sharing the arrays of this table."""
+        table = copy.copy(self)
+        table.advertisers = self.advertisers[:size]
+        for name in ("in_group_a", "values_per_engagement", "budgets", "spreads", "total_spreads", "prices", "eligible"):
+            setattr(table, name, getattr(self, name)[:size])
+        return table
+
+
+def allocate(price_table, extended, approximation_tolerance, allocation_random_state, backend):
     if extended:
-        return allocateExtended(advertisers_a, advertisers_b, value_per_engagement_a, value_per_engagement_b, value_a, value_b, weighted, non_truthful, approximation_tolerance)
+        revenue, social_welfare, upper_bound = allocateExtended(price_table, approximation_tolerance, backend)
+        if current_profile is not None:
+            current_profile.setAllocation(revenue, upper_bound)
+        return revenue, social_welfare
     else:
-        return allocateRandom(advertisers_a, advertisers_b, value_per_engagement_a, value_per_engagement_b, value_a, value_b, weighted, non_truthful, allocation_random_state)
+        return allocateRandom(price_table, allocation_random_state)
 
 
-def allocateExtended(advertisers_a, advertisers_b, value_per_engagement_a, value_per_engagement_b, value_a, value_b, weighted, non_truthful, approximation_tolerance):
-    advertisers = advertisers_a + advertisers_b
-    for advertiser in advertisers:
-        advertiser.resetRemainingBudget()
+def getAssignmentProblem(price_table):
+    """Return the seeder assignment problem of a price table in matrix form.
+
+    The variables are x[column * n + k] = 1 if seeder column goes to the k-th of the n eligible
+    advertisers. Returns the eligible rows, the payments matrix (eligible advertiser x seeder), the
+    seeder constraint matrix (each seeder at most once) and the budget constraint matrix; the
+    objective is the payments matrix flattened in variable order.
+    """
+    eligible_rows = np.flatnonzero(price_table.eligible)
+    number_of_advertisers = len(eligible_rows)
+    number_of_seeders = len(price_table.seeders)
+
+    payments = price_table.prices[eligible_rows, None] * price_table.spreads[eligible_rows]
+
+    variables = np.arange(number_of_advertisers * number_of_seeders)
+    seeder_matrix = scipy.sparse.csr_matrix((np.ones(len(variables)), (variables // max(number_of_advertisers, 1), variables)), shape=(number_of_seeders, len(variables)))
+    budget_matrix = scipy.sparse.csr_matrix((payments.T.ravel(), (variables % max(number_of_advertisers, 1), variables)), shape=(number_of_advertisers, len(variables)))
+
+    return eligible_rows, payments, seeder_matrix, budget_matrix
+
+
+def allocateExtended(price_table, approximation_tolerance, backend):
+    """Return the revenue and social welfare of the backend's allocation of a price table, and the upper bound on
+    the revenue the backend proved, None if it proved none.
+    """
+    advertisers = price_table.advertisers
 
     revenue = 0
     social_welfare = 0
+    upper_bound = 0.0
+
+    with profilePhase("assignment_problem"):
+        eligible_rows, payments, seeder_matrix, budget_matrix = getAssignmentProblem(price_table)
+
+    if payments.size > 0:
+
+        x, upper_bound = backend.solveAssignment(payments.T.ravel(), seeder_matrix, budget_matrix, price_table.budgets[eligible_rows], approximation_tolerance)
+
+        # revenue and social welfare
+        if x is not None:
+            with profilePhase("extraction"):
+                allocated = np.isclose(x.reshape(payments.T.shape), 1, rtol=0, atol=EPSILON)
+                for column, index in zip(*np.nonzero(allocated)):
+                    row = eligible_rows[index]
+                    revenue += float(payments[index, column])
+                    social_welfare += advertisers[row].value_per_engagement * float(price_table.spreads[row, column])
+
+    return revenue, social_welfare, upper_bound
+
 
-    if len(advertisers) > 0:
+class GurobiBackend(object):
+    """MILP backend using Gurobi.
+
+    gurobipy is imported when the backend is created, not when this module is loaded. Like every backend,
+    solveAssignment returns the allocation and an upper bound on its objective, (None, None) on failure.
+    """
+    def __init__(self):
+        import gurobipy
+
+    def solveAssignment(self, objective, seeder_matrix, budget_matrix, budgets, approximation_tolerance):
+        import gurobipy
 
         try:
-            model = gurobipy.Model("auction")
-            model.Params.MIPGap = approximation_tolerance
-
-            vars = {}
-
-            # determine eligible advertisers
-            eligible_advertisers = []
-            for advertiser in advertisers:
-                price = getPrice(advertiser, value_a, value_b, value_per_engagement_a, value_per_engagement_b, advertisers_a, advertisers_b, weighted, non_truthful)
-                if price <= advertiser.value_per_engagement + EPSILON:
-                    eligible_advertisers.append(advertiser)
-
-            # create variables
-            for seeder in advertisers[0].spread_dict.keys():
-                if seeder not in vars:
-                    vars[seeder] = {}
-                for advertiser in eligible_advertisers:
-                    vars[seeder][advertiser.id] = model.addVar(vtype=gurobipy.GRB.BINARY, name=advertiser.id)
-
-            # constraints: seeders can only be allocated to one advertiser
-            for seeder in vars.keys():
-                lefthandside = None
-                for advertiser in eligible_advertisers:
-                    if lefthandside:
-                        lefthandside += vars[seeder][advertiser.id]
-                    else:
-                        lefthandside = vars[seeder][advertiser.id]
-
-                model.addConstr(lefthandside <= 1)
-
-            # constraints: advertisers can not spend more than their budget
-            # objective: maximize revenue
-            objective = None
-            for advertiser in eligible_advertisers:
-                price = getPrice(advertiser, value_a, value_b, value_per_engagement_a, value_per_engagement_b, advertisers_a, advertisers_b, weighted, non_truthful)
-                lefthandside = None
-                for seeder in advertiser.spread_dict.keys():
-                    value = price * advertiser.spread_dict[seeder] * vars[seeder][advertiser.id]
-                    lefthandside += value
-                    objective += value
-
-                    model.update()
-                    
-                model.addConstr(lefthandside <= advertiser.budget)
-
-            model.setObjective(objective, gurobipy.GRB.MAXIMIZE)
-            
-            model.optimize()
-            
-            # revenue and social welfare
-            for seeder in advertisers[0].spread_dict.keys():
-                for advertiser in eligible_advertisers:
-                    if math.isclose(vars[seeder][advertiser.id].X, 1, abs_tol=EPSILON):
-                        price = getPrice(advertiser, value_a, value_b, value_per_engagement_a, value_per_engagement_b, advertisers_a, advertisers_b, weighted, non_truthful)
-                        revenue += price * advertiser.spread_dict[seeder]
-                        social_welfare += advertiser.value_per_engagement * advertiser.spread_dict[seeder]
+            with profilePhase("model_build"):
+                model = gurobipy.Model("auction")
+                model.Params.MIPGap = approximation_tolerance
+
+                x = model.addMVar(len(objective), vtype=gurobipy.GRB.BINARY)
+
+                # constraints: seeders can only be allocated to one advertiser
+                model.addConstr(seeder_matrix @ x <= 1)
+
+                # constraints: advertisers can not spend more than their budget
+                model.addConstr(budget_matrix @ x <= budgets)
+
+                # objective: maximize revenue
+                model.setObjective(objective @ x, gurobipy.GRB.MAXIMIZE)
+
+            with profilePhase("solve"):
+                model.optimize()
+
+            if current_profile is not None:
+                current_profile.addMip("gurobi", model.NumVars, model.NumConstrs, model.NumNZs, model.NodeCount, model.MIPGap)
+
+            return x.X, model.ObjBound
 
         except gurobipy.GurobiError as error:
             print('Gurobi reported an error:')
             print(error)
 
-    return revenue, social_welfare
+        return None, None
+
+    def prefixSolver(self, price_table, approximation_tolerance):
+        return GurobiPrefixSolver(price_table, approximation_tolerance)
 
 
-def allocateRandom(advertisers_a, advertisers_b, value_per_engagement_a, value_per_engagement_b, value_a, value_b, weighted, non_truthful, allocation_random_state):
-    advertisers = advertisers_a + advertisers_b
+class HighsBackend(object):
+    """MILP backend using the open-source HiGHS solver through scipy.optimize.milp."""
+    def solveAssignment(self, objective, seeder_matrix, budget_matrix, budgets, approximation_tolerance):
+        with profilePhase("model_build"):
+            constraints = [scipy.optimize.LinearConstraint(matrix, -np.inf, upper_bound) for matrix, upper_bound in [(seeder_matrix, 1), (budget_matrix, budgets)] if matrix.shape[0] > 0]
+
+        # milp minimizes
+        with profilePhase("solve"):
+            result = scipy.optimize.milp(-objective, integrality=np.ones(len(objective)), bounds=scipy.optimize.Bounds(0, 1), constraints=constraints, options={"mip_rel_gap": approximation_tolerance})
+
+        if current_profile is not None:
+            current_profile.addMip("highs", len(objective), seeder_matrix.shape[0] + budget_matrix.shape[0], seeder_matrix.nnz + budget_matrix.nnz, getattr(result, "mip_node_count", None), getattr(result, "mip_gap", None))
+
+        if result.x is None:
+            print('HiGHS reported an error:')
+            print(result.message)
+            return None, None
+
+        # the dual bound of the minimization, None if this scipy does not report it
+        dual_bound = getattr(result, "mip_dual_bound", None)
+        return result.x, None if dual_bound is None else -dual_bound
+
+    def prefixSolver(self, price_table, approximation_tolerance):
+        return RebuildPrefixSolver(price_table, approximation_tolerance, self)
+
+
+class RebuildPrefixSolver(object):
+    """Prefix solver for backends without incremental models, every prefix is solved from scratch."""
+    def __init__(self, price_table, approximation_tolerance, backend):
+        self.price_table = price_table
+        self.approximation_tolerance = approximation_tolerance
+        self.backend = backend
+
+    def solve(self, size, reserve):
+        revenue, _, _ = allocateExtended(self.price_table.prefix(size), self.approximation_tolerance, self.backend)
+        return revenue
+
+
+class ApproximateBackend(object):
+    """Approximate backend solving the LP relaxation and rounding it to a feasible allocation.
+
+    The variables are laid out as in getAssignmentProblem. Variables are assigned in order of their
+    fractional LP value, then the remaining budgets are filled greedily with the largest payments
+    and unassigned seeders are swapped in for cheaper ones where that raises revenue. The LP
+    optimum bounds the revenue of any integral allocation from above and is returned as the upper
+    bound; the relative gap between the two is recorded in the profile trace.
+    """
+    def solveAssignment(self, objective, seeder_matrix, budget_matrix, budgets, approximation_tolerance):
+        number_of_seeders = seeder_matrix.shape[0]
+        number_of_advertisers = budget_matrix.shape[0]
+
+        # LP relaxation, linprog minimizes
+        with profilePhase("solve"):
+            result = scipy.optimize.linprog(-objective, A_ub=scipy.sparse.vstack([seeder_matrix, budget_matrix]), b_ub=np.concatenate([np.ones(number_of_seeders), budgets]), bounds=(0, 1), method="highs")
+
+        if result.x is None:
+            print('HiGHS reported an error:')
+            print(result.message)
+            return None, None
+
+        with profilePhase("rounding"):
+            x = self.round(result.x, objective, number_of_seeders, number_of_advertisers, budgets)
+
+        revenue = float(objective @ x)
+        upper_bound = max(-result.fun, revenue)
+
+        if current_profile is not None:
+            current_profile.addMip("approximate", len(objective), number_of_seeders + number_of_advertisers, seeder_matrix.nnz + budget_matrix.nnz, 0, getGap(revenue, upper_bound))
+
+        return x, upper_bound
+
+    def round(self, relaxation, objective, number_of_seeders, number_of_advertisers, budgets):
+        """Return an integral allocation built from the LP solution relaxation."""
+        payments = objective.tolist()
+        remaining_budgets = np.asarray(budgets, dtype=np.float64).tolist()
+        seeder_assignment = [None] * number_of_seeders
+        advertiser_seeders = [set() for _ in range(number_of_advertisers)]
+
+        def payment(seeder, advertiser):
+            return payments[seeder * number_of_advertisers + advertiser]
+
+        def assign(seeder, advertiser):
+            if seeder_assignment[seeder] is None and 0 < payment(seeder, advertiser) <= remaining_budgets[advertiser]:
+                seeder_assignment[seeder] = advertiser
+                advertiser_seeders[advertiser].add(seeder)
+                remaining_budgets[advertiser] -= payment(seeder, advertiser)
+
+        def release(seeder):
+            advertiser = seeder_assignment[seeder]
+            seeder_assignment[seeder] = None
+            advertiser_seeders[advertiser].remove(seeder)
+            remaining_budgets[advertiser] += payment(seeder, advertiser)
+
+        # rounding: variables in order of their LP value, ties broken by payment
+        fractional = np.flatnonzero(relaxation > EPSILON)
+        for variable in fractional[np.lexsort((-objective[fractional], -relaxation[fractional]))].tolist():
+            assign(*divmod(variable, number_of_advertisers))
+
+        # greedy: fill the remaining budgets with the largest payments
+        for variable in np.argsort(-objective, kind="stable").tolist():
+            assign(*divmod(variable, number_of_advertisers))
+
+        # repair: swap an unassigned seeder in for a cheaper seeder of the same advertiser
+        for seeder in range(number_of_seeders):
+            if seeder_assignment[seeder] is not None:
+                continue
+            for advertiser in range(number_of_advertisers):
+                cheaper_seeders = [other for other in advertiser_seeders[advertiser] if payment(other, advertiser) < payment(seeder, advertiser) <= remaining_budgets[advertiser] + payment(other, advertiser)]
+                if cheaper_seeders:
+                    other = min(cheaper_seeders)
+                    release(other)
+                    assign(seeder, advertiser)
+                    # the released seeder may fit another advertiser
+                    for other_advertiser in sorted(range(number_of_advertisers), key=lambda other_advertiser: -payment(other, other_advertiser)):
+                        assign(other, other_advertiser)
+                    break
+
+        x = np.zeros(len(payments))
+        for seeder, advertiser in enumerate(seeder_assignment):
+            if advertiser is not None:
+                x[seeder * number_of_advertisers + advertiser] = 1
+
+        return x
+
+    def prefixSolver(self, price_table, approximation_tolerance):
+        return RebuildPrefixSolver(price_table, approximation_tolerance, self)
+
+
+class VerifiedBackend(object):
+    """Approximate allocation, verified against the LP bound.
+
+    The approximate allocation is kept if its gap is within the approximation tolerance, which
+    gives the same guarantee as an exact solve with that MIP gap. Otherwise the exact backend solves
+    the problem, and the tighter of the two bounds is returned.
+    """
+    def __init__(self, exact_backend):
+        self.approximate_backend = ApproximateBackend()
+        self.exact_backend = exact_backend
+
+    def solveAssignment(self, objective, seeder_matrix, budget_matrix, budgets, approximation_tolerance):
+        x, upper_bound = self.approximate_backend.solveAssignment(objective, seeder_matrix, budget_matrix, budgets, approximation_tolerance)
+        if x is None or getGap(float(objective @ x), upper_bound) > approximation_tolerance:
+            x, exact_upper_bound = self.exact_backend.solveAssignment(objective, seeder_matrix, budget_matrix, budgets, approximation_tolerance)
+            if upper_bound is None or (exact_upper_bound is not None and exact_upper_bound < upper_bound):
+                upper_bound = exact_upper_bound
+        return x, upper_bound
+
+    def prefixSolver(self, price_table, approximation_tolerance):
+        return RebuildPrefixSolver(price_table, approximation_tolerance, self)
+
+BACKENDS = {"gurobi": GurobiBackend, "highs": HighsBackend}
+ALLOCATIONS = ["exact", "approximate", "verify"]
+
+
+def getBackend(backend_name, allocation):
+    if allocation == "approximate":
+        return ApproximateBackend()
+    backend = BACKENDS[backend_name]()
+    if allocation == "verify":
+        return VerifiedBackend(backend)
+    return backend
+
+class GurobiPrefixSolver(object):
+    """Allocation of growing prefixes of one group on a single persistent Gurobi model.
+
+    All advertisers of a prefix are priced against the same reserve r, so each price is
+    r * spread / total spread (weighted) or r (unweighted). Dividing the budget constraints by r
+    leaves r only in their right-hand sides. Extending the prefix adds the columns of the new
+    advertisers and updates those right-hand sides. Reserves do not increase along the sorted
+    prefixes, so the previous allocation stays feasible and is used as the start of the next solve.
+    """
+    def __init__(self, price_table, approximation_tolerance):
+        import gurobipy
+
+        self.price_table = price_table
+        self.size = 0
+
+        spreads = price_table.spreads
+        if price_table.weighted:
+            spreads = np.divide(spreads, price_table.total_spreads[:, None], out=np.zeros(spreads.shape), where=price_table.total_spreads[:, None] > 0)
+        self.scaled_spreads = spreads.tolist()
+        self.spreads = price_table.spreads.tolist()
+
+        self.model = gurobipy.Model("prefix")
+        self.model.Params.MIPGap = approximation_tolerance
+
+        # constraints: seeders can only be allocated to one advertiser
+        self.seeder_constraints = [self.model.addConstr(gurobipy.LinExpr() <= 1) for _ in price_table.seeders]
+        self.model.ModelSense = gurobipy.GRB.MAXIMIZE
+        self.budget_constraints = []
+        self.vars = []
+        self.start = []
+
+    def extend(self, size):
+        import gurobipy
+
+        for row in range(self.size, size):
+            # constraint: advertisers can not spend more than their budget, right-hand side set in solve
+            budget_constraint = self.model.addConstr(gurobipy.LinExpr() <= 0)
+            self.budget_constraints.append(budget_constraint)
+
+            row_vars = []
+            for column, seeder_constraint in enumerate(self.seeder_constraints):
+                spread = self.scaled_spreads[row][column]
+                row_vars.append(self.model.addVar(vtype=gurobipy.GRB.BINARY, obj=spread, column=gurobipy.Column([1, spread], [seeder_constraint, budget_constraint])))
+            self.vars.append(row_vars)
+
+        self.size = size
+
+    def solve(self, size, reserve):
+        """Return the revenue of the first size advertisers of the price table at its current prices."""
+        import gurobipy
+
+        revenue = 0
+
+        try:
+            with profilePhase("model_build"):
+                self.extend(size)
+
+            if reserve <= 0:
+                return revenue
+
+            budgets = (self.price_table.budgets[:size] / reserve).tolist()
+            eligible = self.price_table.eligible[:size].tolist()
+            self.model.setAttr("RHS", self.budget_constraints, budgets)
+            for row in range(size):
+                self.model.setAttr("UB", self.vars[row], [1 if eligible[row] else 0] * len(self.vars[row]))
+
+            # warm start from the previous incumbent, new advertisers start unallocated
+            start = self.start + [[0] * len(self.vars[row]) for row in range(len(self.start), size)]
+            self.model.setAttr("Start", [var for row_vars in self.vars for var in row_vars], [value for row_start in start for value in row_start])
+
+            # discard the previous solve, so the start above is the only one Gurobi has to process
+            self.model.reset(0)
+            with profilePhase("solve"):
+                self.model.optimize()
+
+            if current_profile is not None:
+                current_profile.addMip("gurobi", self.model.NumVars, self.model.NumConstrs, self.model.NumNZs, self.model.NodeCount, self.model.MIPGap)
+
+            # revenue
+            with profilePhase("extraction"):
+                prices = self.price_table.prices.tolist()
+                self.start = []
+                for row in range(size):
+                    row_start = [1 if math.isclose(value, 1, abs_tol=EPSILON) else 0 for value in self.model.getAttr("X", self.vars[row])]
+                    for column in range(len(row_start)):
+                        if row_start[column]:
+                            revenue += prices[row] * self.spreads[row][column]
+                    self.start.append(row_start)
+
+        except gurobipy.GurobiError as error:
+            print('Gurobi reported an error:')
+            print(error)
+
+        return revenue
+
+def allocateRandom(price_table, allocation_random_state):
+    advertisers = price_table.advertisers
     for advertiser in advertisers:
         advertiser.resetRemainingBudget()
 
-    seeders = list(advertisers[0].spread_dict.keys())
-    allocation_random_state.shuffle(seeders)
+    spreads = price_table.spreads.tolist()
+    prices = price_table.prices.tolist()
+    # advertisers with a positive price they are willing to pay
+    bidding = ((price_table.prices > 0) & price_table.eligible).tolist()
+
+    # shuffle row and column indices instead of the advertisers and seeders themselves
+    columns = list(range(len(price_table.seeders)))
+    allocation_random_state.shuffle(columns)
+    rows = list(range(len(advertisers)))
 
     revenue = 0
     social_welfare = 0
 
-    for seeder in seeders:
+    for column in columns:
         
         # find an advertiser who can afford the seeder
 
         allocated = False
         
         # create a new random sequence for allocation
-        allocation_random_state.shuffle(advertisers)
+        allocation_random_state.shuffle(rows)
 
-        for advertiser in advertisers:
+        for row in rows:
+            advertiser = advertisers[row]
             if not allocated:
-                price = getPrice(advertiser, value_a, value_b, value_per_engagement_a, value_per_engagement_b, advertisers_a, advertisers_b, weighted, non_truthful)
-                if price > 0:            
+                if bidding[row]:
                     # check if advertiser can afford the price
-                    payment = price * advertiser.spread_dict[seeder]
-                    if price <= advertiser.value_per_engagement + EPSILON and payment <= advertiser.remaining_budget:
+                    payment = prices[row] * spreads[row][column]
+                    if payment <= advertiser.remaining_budget:
                         advertiser.remaining_budget -= payment
                         revenue += payment
-                        social_welfare += advertiser.value_per_engagement * advertiser.spread_dict[seeder]
+                        social_welfare += advertiser.value_per_engagement * spreads[row][column]
                         allocated = True
                         break
 
     return revenue, social_welfare
 
 
+def sumSpreads(spreads):
+    """Sum the rows of a spread matrix.
+
+    The columns are added one after the other, so each total is identical to summing the row
+    with sum(), not just close to it.
+    """
+    total_spreads = np.zeros(spreads.shape[0])
+    for column in spreads.T:
+        total_spreads += column
+    return total_spreads
+
+
+
+def getSpreadMatrix(advertisers):
+    """Return the spreads of the advertisers as an advertiser x seeder matrix together with the seeders of its columns.
+
+    Advertisers sharing one dataset are gathered from its spread matrix directly, otherwise the
+    rows are aligned to the seeders of the first advertiser.
+    """
+    dataset = advertisers[0].dataset
+    seeders = dataset.seeders
+
+    if all(advertiser.dataset is dataset for advertiser in advertisers):
+        return dataset.spreads[[advertiser.index for advertiser in advertisers]], seeders
+
+    spreads = np.empty((len(advertisers), len(seeders)))
+    for row, advertiser in enumerate(advertisers):
+        spreads[row] = [advertiser.spread(seeder) for seeder in seeders]
+
+    return spreads, seeders
+
+
+class Dataset(object):
+    """Values, budgets and spreads of a set of advertisers.
+
+    The spreads are held in one contiguous advertiser x seeder matrix. Seeder ids are mapped to
+    column indices once, rows and columns can be read without copying.
+    """
+    def __init__(self, values_per_engagement, budgets, spreads, seeders):
+        self.values_per_engagement = [float(value_per_engagement) for value_per_engagement in values_per_engagement]
+        self.budgets = [float(budget) for budget in budgets]
+        self.spreads = np.ascontiguousarray(spreads, dtype=np.float64).reshape(len(self.budgets), len(seeders))
+        self.seeders = list(seeders)
+        self.seeder_index = {seeder: column for column, seeder in enumerate(self.seeders)}
+        self.total_spreads = sumSpreads(self.spreads).tolist()
+        self.values = [value_per_engagement * total_spread for value_per_engagement, total_spread in zip(self.values_per_engagement, self.total_spreads)]
+        self.sorted_orders = {}
+
+    def row(self, index):
+        return self.spreads[index]
+
+    def column(self, seeder):
+        return self.spreads[:, self.seeder_index[seeder]]
+
+    def sortedOrder(self, weighted):
+        """Return the indices sorted by value (weighted) or value per engagement, highest first, ties by index, and the keys."""
+        if weighted not in self.sorted_orders:
+            keys = np.array(self.values if weighted else self.values_per_engagement, dtype=np.float64)
+            self.sorted_orders[weighted] = (np.argsort(-keys, kind='stable'), keys)
+        return self.sorted_orders[weighted]
+
+    def advertisers(self):
+        return [Advertiser(self.values_per_engagement[index], self.budgets[index], dataset=self, index=index) for index in range(len(self.budgets))]
+
+
 class Advertiser(object):
-    def __init__(self, value_per_engagement, budget, spread_dict):
+    """A row view into a Dataset.
+
+    If no dataset is given, a single-row dataset is created from spread_dict.
+    """
+    __slots__ = ("value_per_engagement", "budget", "dataset", "index", "spreads", "remaining_budget")
+
+    def __init__(self, value_per_engagement, budget, spread_dict=None, dataset=None, index=0):
+        if dataset is None:
+            dataset = Dataset([value_per_engagement], [budget], [list(spread_dict.values())], spread_dict.keys())
+            index = 0
         self.value_per_engagement = value_per_engagement
         self.budget = budget
-        self.spread_dict = dict(spread_dict)
+        self.dataset = dataset
+        self.index = index
+        self.spreads = dataset.row(index)
         self.resetRemainingBudget()
-        self.id = str(uuid.uuid4())
+
+    def duplicate(self):
+        """Return a second handle on the same dataset row, with its own remaining budget."""
+        duplicate = Advertiser.__new__(Advertiser)
+        duplicate.value_per_engagement = self.value_per_engagement
+        duplicate.budget = self.budget
+        duplicate.dataset = self.dataset
+        duplicate.index = self.index
+        duplicate.spreads = self.spreads
+        duplicate.remaining_budget = self.budget
+        return duplicate
 
     def resetRemainingBudget(self):
         self.remaining_budget = self.budget
 
+    def spread(self, seeder):
+        return self.spreads[self.dataset.seeder_index[seeder]]
+
+    def totalSpread(self):
+        return self.dataset.total_spreads[self.index]
+
     def value(self):
-        return self.value_per_engagement * sum(self.spread_dict.values())
+        return self.dataset.values[self.index]
 
 
-def loadData(path, spread_filename, advertisers_filename, count_seeder):
+def parseData(path, spread_filename, advertisers_filename, count_seeder):
     spread_list = []
+    seeder_index = {}
     with open(path + spread_filename) as input_file:
         input_reader = csv.reader(input_file, delimiter=',')
 
@@ -273,45 +832,106 @@ def loadData(path, spread_filename, advertisers_filename, count_seeder):
             while len(spread_list) <= advertiser:
                 spread_list.append({})
 
+            if seeder not in seeder_index:
+                seeder_index[seeder] = len(seeder_index)
+
             if count_seeder:
                 spread += 1
-            spread_list[advertiser][seeder] = spread
+            spread_list[advertiser][seeder_index[seeder]] = spread
 
-    advertisers_list = []
+    values_per_engagement = []
+    budgets = []
     with open(path + advertisers_filename) as input_file:
         input_reader = csv.reader(input_file, delimiter=',')
 
-        index = 0
         for row in input_reader:
-            value_per_engagement = float(row[0])
-            budget = float(row[1])
-            advertisers_list.append(Advertiser(value_per_engagement, budget, spread_list[index]))
-            index += 1
+            values_per_engagement.append(float(row[0]))
+            budgets.append(float(row[1]))
 
-    return advertisers_list
+    spreads = np.zeros((len(budgets), len(seeder_index)))
+    for index in range(len(budgets)):
+        for column, spread in spread_list[index].items():
+            spreads[index, column] = spread
 
+    return Dataset(values_per_engagement, budgets, spreads, seeder_index.keys())
 
-def runAuction(advertisers_list, output, approximation_tolerance, group_seed, random_allocation_seed, weighted, extended, count_seeder, non_truthful, iterations):
-    
-    # Two random state for group-split and random allocation
-    group_random_state = np.random.RandomState(group_seed)
-    allocation_random_state = np.random.RandomState(random_allocation_seed)
-    
-    write_header = False
-    if not os.path.exists(output):
-        write_header = True
 
-    with open(output, 'a', newline='') as output_file:
+# Arrays of a cached dataset, each stored as one .npy file in the cache directory
+CACHE_ARRAYS = ("values_per_engagement", "budgets", "spreads", "seeders")
 
-        output_writer = csv.writer(output_file, delimiter=',')
 
-        revenue_list = []
-        social_welfare_list = []
-        runtime_list = []
+def getCacheKey(path, spread_filename, advertisers_filename, count_seeder):
+    key = {"count_seeder": count_seeder}
+    for filename in (spread_filename, advertisers_filename):
+        key.update(getFileKey(path + filename))
+    return key
+
+
+def getCacheDirectory(path, spread_filename, advertisers_filename, count_seeder):
+    name = hashlib.sha1(json.dumps([spread_filename, advertisers_filename, count_seeder]).encode()).hexdigest()[:12]
+    return os.path.join(path, ".cache", name)
+
 
-        start = time.time()
+def readCache(cache_directory, key):
+    try:
+        with open(os.path.join(cache_directory, "key.json")) as key_file:
+            if json.load(key_file) != key:
+                return None
+        arrays = {name: np.load(os.path.join(cache_directory, name + ".npy"), mmap_mode='r') for name in CACHE_ARRAYS}
+    except (OSError, ValueError):
+        return None
+    return Dataset(arrays["values_per_engagement"].tolist(), arrays["budgets"].tolist(), arrays["spreads"], arrays["seeders"].tolist())
 
-        for i in range(iterations):
+
+def writeCache(cache_directory, key, dataset):
+    openCache(cache_directory)
+    arrays = {"values_per_engagement": dataset.values_per_engagement, "budgets": dataset.budgets, "spreads": dataset.spreads, "seeders": dataset.seeders}
+    for name in CACHE_ARRAYS:
+        saveArray(cache_directory, name, arrays[name])
+    commitCache(cache_directory, key)
+
+
+def loadData(path, spread_filename, advertisers_filename, count_seeder, cache=True):
+    if not cache:
+        return parseData(path, spread_filename, advertisers_filename, count_seeder).advertisers()
+
+    # The parsed dataset is cached in binary form next to the input. The cache is keyed by size and
+    # modification time of the input files, so it is rebuilt whenever one of them changes
+    key = getCacheKey(path, spread_filename, advertisers_filename, count_seeder)
+    cache_directory = getCacheDirectory(path, spread_filename, advertisers_filename, count_seeder)
+    dataset = readCache(cache_directory, key)
+    if dataset is None:
+        dataset = parseData(path, spread_filename, advertisers_filename, count_seeder)
+        try:
+            writeCache(cache_directory, key, dataset)
+        except OSError:
+            # the input directory may not be writable, the dataset is just not cached then
+            pass
+
+    return dataset.advertisers()
+
+
+def getRandomStates(group_seed, random_allocation_seed, iteration):
+    # Every iteration draws from its own substreams of the two seeds, so its result does not
+    # depend on the iterations before it or on the process that runs it
+    group_random_state = np.random.RandomState(np.random.MT19937(np.random.SeedSequence(group_seed, spawn_key=(iteration,))))
+    allocation_random_state = np.random.RandomState(np.random.MT19937(np.random.SeedSequence(random_allocation_seed, spawn_key=(iteration,))))
+    return group_random_state, allocation_random_state
+
+
+def runIteration(advertisers_list, approximation_tolerance, group_seed, random_allocation_seed, weighted, extended, non_truthful, backend, iteration, profiling=False):
+    global current_profile
+
+    group_random_state, allocation_random_state = getRandomStates(group_seed, random_allocation_seed, iteration)
+
+    if profiling:
+        current_profile = Profile()
+
+    start = time.time()
+
+    try:
+        with profilePhase("split"):
+            advertisers_list = list(advertisers_list)
             number_of_advertisers = len(advertisers_list)
             group_random_state.shuffle(advertisers_list)
 
@@ -323,26 +943,196 @@ def runAuction(advertisers_list, output, approximation_tolerance, group_seed, ra
                 advertisers_b = advertisers_list[:int(number_of_advertisers/2)]
                 advertisers_a = advertisers_list[int(number_of_advertisers/2):]
 
-            value_per_engagement_a, value_a = maximizeGroupRevenue(advertisers_a, weighted, extended, approximation_tolerance)
-            value_per_engagement_b, value_b = maximizeGroupRevenue(advertisers_b, weighted, extended, approximation_tolerance)
-            revenue, social_welfare = allocate(advertisers_a, advertisers_b, value_per_engagement_a, value_per_engagement_b, value_a, value_b, weighted, extended, non_truthful, approximation_tolerance, allocation_random_state)
+        with profilePhase("group_revenue"):
+            value_per_engagement_a, value_a = maximizeGroupRevenue(advertisers_a, weighted, extended, approximation_tolerance, backend)
+            value_per_engagement_b, value_b = maximizeGroupRevenue(advertisers_b, weighted, extended, approximation_tolerance, backend)
+        with profilePhase("pricing"):
+            price_table = PriceTable(advertisers_a, advertisers_b, weighted, non_truthful)
+            price_table.setReserves(value_per_engagement_a, value_per_engagement_b, value_a, value_b)
+        with profilePhase("allocation"):
+            revenue, social_welfare = allocate(price_table, extended, approximation_tolerance, allocation_random_state, backend)
+
+        runtime = time.time() - start
+
+        trace = None
+        if profiling:
+            trace = current_profile.trace()
+    finally:
+        current_profile = None
+
+    return revenue, social_welfare, runtime, trace
+
+
+# Arguments shared by all iterations of a worker process, set once by the pool initializer
+worker_arguments = None
+
+
+def initializeWorker(*arguments):
+    global worker_arguments
+    worker_arguments = arguments
+
 
-            revenue_list.append(revenue)
-            social_welfare_list.append(social_welfare)
+def runWorkerIteration(iteration, profiling):
+    return runIteration(*worker_arguments, iteration, profiling)
 
-            runtime_list.append(time.time() - start)
 
-        runtime_mean = (time.time() - start) / iterations
+def iterateResultRows(advertisers_list, spread_filename, advertisers_filename, approximation_tolerance, group_seed, random_allocation_seed, weighted, extended, non_truthful, iterations, backend, workers=1, first_iteration=0, runtime_accumulated=0, profiling=False):
+    """Yield the result row of every iteration and its trace, which is None unless profiling."""
+
+    arguments = (advertisers_list, approximation_tolerance, group_seed, random_allocation_seed, weighted, extended, non_truthful, backend)
+    if workers > 1:
+        # the advertisers are sent to every worker once; map returns the results in iteration order
+        executor = concurrent.futures.ProcessPoolExecutor(workers, initializer=initializeWorker, initargs=arguments)
+        results = executor.map(runWorkerIteration, range(first_iteration, iterations), itertools.repeat(profiling))
+    else:
+        executor = None
+        results = (runIteration(*arguments, i, profiling) for i in range(first_iteration, iterations))
+
+    mode = "random"
+    if extended:
+        mode = "extended"
+    if non_truthful:
+        mode = "bound"
+
+    try:
+        for i, (revenue, social_welfare, runtime, trace) in zip(range(first_iteration, iterations), results):
+            # the mean runtime of the iterations so far, so the last row holds the mean of the whole run
+            runtime_accumulated += runtime
+            runtime_mean = runtime_accumulated / (i + 1)
+            if trace is not None:
+                trace = dict({"advertisers": advertisers_filename, "spread": spread_filename, "weighted": weighted, "mode": mode, "group_seed": group_seed,
+                              "random_allocation_seed": random_allocation_seed, "iteration": i, "runtime": runtime}, **trace)
+            yield (advertisers_filename, iterations, spread_filename, weighted, mode, revenue, social_welfare, runtime_accumulated, runtime_mean, group_seed, random_allocation_seed), trace
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def getResultRows(advertisers_list, spread_filename, advertisers_filename, approximation_tolerance, group_seed, random_allocation_seed, weighted, extended, non_truthful, iterations, backend, workers=1):
+    return [row for row, _ in iterateResultRows(advertisers_list, spread_filename, advertisers_filename, approximation_tolerance, group_seed, random_allocation_seed, weighted, extended, non_truthful, iterations, backend, workers)]
+
+
+def writeHeader(output_writer):
+    output_writer.writerow(("advertisers", "iterations", "spread", "weighted", "mode", "revenue", "sw", "runtime_accumulated", "runtime_mean", "group_seed", "random_allocation_seed"))
+
+
+def writeResultRows(output, rows):
+
+    write_header = False
+    if not os.path.exists(output):
+        write_header = True
+
+    with open(output, 'a', newline='') as output_file:
+
+        output_writer = csv.writer(output_file, delimiter=',')
+
+        if write_header:
+            writeHeader(output_writer)
+        output_writer.writerows(rows)
+
+
+def getCheckpointFilename(output, run):
+    # one checkpoint per run, so several runs can append to the same output and each be resumed
+    key = hashlib.sha1(json.dumps(run, sort_keys=True).encode()).hexdigest()[:12]
+    return output + "." + key + ".checkpoint"
+
+
+def readCheckpoint(checkpoint_filename, output):
+    if not os.path.exists(checkpoint_filename) or not os.path.exists(output):
+        return None
+    with open(checkpoint_filename) as checkpoint_file:
+        return json.load(checkpoint_file)
+
+
+def writeCheckpoint(checkpoint_filename, checkpoint):
+    # replace the checkpoint atomically, so an interrupted write leaves the previous one
+    with open(checkpoint_filename + ".tmp", 'w') as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file)
+    os.replace(checkpoint_filename + ".tmp", checkpoint_filename)
+
+
+def truncateInterrupted(open_file, offset, pending):
+    """Drop the line an interrupted run was writing at offset, if the file ends within it.
+
+    pending is the length of that line. A file that grew further holds rows other runs appended since
+    the checkpoint and is left as it is.
+    """
+    size = open_file.seek(0, os.SEEK_END)
+    if offset is not None and offset < size <= offset + pending:
+        open_file.truncate(offset)
+
+
+def formatRow(row):
+    row_text = io.StringIO()
+    csv.writer(row_text, delimiter=',').writerow(row)
+    return row_text.getvalue()
+
+
+def runAuction(advertisers_list, spread_filename, advertisers_filename, output, approximation_tolerance, group_seed, random_allocation_seed, weighted, extended, non_truthful, iterations, backend, workers=1, resume=False, profiling=False, path="", count_seeder=False):
+
+    # path and count_seeder identify the input along with the file names, so runs on different inputs never share a checkpoint
+    run = {"path": os.path.abspath(path), "advertisers": advertisers_filename, "spread": spread_filename, "count_seeder": count_seeder,
+           "tolerance": approximation_tolerance, "group_seed": group_seed, "random_allocation_seed": random_allocation_seed, "weighted": weighted,
+           "extended": extended, "non_truthful": non_truthful, "iterations": iterations, "backend": type(backend).__name__ if backend is not None else None}
+    checkpoint_filename = getCheckpointFilename(output, run)
+
+    # The random states of an iteration only depend on the seeds and its index, so the number of
+    # completed iterations is all that is needed to continue the run with the same rows
+    checkpoint = None
+    if resume:
+        checkpoint = readCheckpoint(checkpoint_filename, output)
+        # a finished run is not run again, and its output is not touched
+        if checkpoint is not None and (checkpoint.get("complete") or checkpoint["iteration"] >= iterations):
+            return
+    if checkpoint is None:
+        checkpoint = {"run": run, "iteration": 0, "runtime_accumulated": 0, "offset": None, "trace_offset": None}
+
+    write_header = False
+    if not os.path.exists(output):
+        write_header = True
+
+    with open(output, 'a', newline='') as output_file, contextlib.ExitStack() as trace_stack:
+
+        # drop the row an interrupted run was writing, but none written by other runs since
+        truncateInterrupted(output_file, checkpoint["offset"], checkpoint.get("pending", 0))
+
+        # the traces of the iterations go to a sidecar file, one JSON object per line
+        trace_file = None
+        if profiling:
+            trace_file = trace_stack.enter_context(open(output + ".trace.jsonl", 'a'))
+            truncateInterrupted(trace_file, checkpoint.get("trace_offset"), checkpoint.get("trace_pending", 0))
 
         if write_header:
-            output_writer.writerow(("advertisers", "iterations", "spread", "weighted", "mode", "revenue", "sw", "runtime_accumulated", "runtime_mean", "group_seed", "random_allocation_seed"))
-        mode = "random"
-        if extended:
-            mode = "extended"
-        if non_truthful:
-            mode = "bound"
-        for i in range(len(revenue_list)):
-            output_writer.writerow((advertisers_filename, iterations, spread_filename, weighted, mode, revenue_list[i], social_welfare_list[i], runtime_list[i], runtime_mean, group_seed, random_allocation_seed))
+            writeHeader(csv.writer(output_file, delimiter=','))
+            output_file.flush()
+
+        rows = iterateResultRows(advertisers_list, spread_filename, advertisers_filename, approximation_tolerance, group_seed, random_allocation_seed, weighted, extended, non_truthful, iterations, backend, workers, checkpoint["iteration"], checkpoint["runtime_accumulated"], profiling)
+        for row, trace in rows:
+            # the lengths of the lines about to be written tell a resumed run what it may truncate
+            row_text = formatRow(row)
+            checkpoint["offset"] = output_file.tell()
+            checkpoint["pending"] = len(row_text.encode(output_file.encoding))
+            if trace_file is not None:
+                trace_text = json.dumps(trace) + "\n"
+                checkpoint["trace_offset"] = trace_file.tell()
+                checkpoint["trace_pending"] = len(trace_text.encode(trace_file.encoding))
+            writeCheckpoint(checkpoint_filename, checkpoint)
+
+            output_file.write(row_text)
+            output_file.flush()
+            if trace_file is not None:
+                trace_file.write(trace_text)
+                trace_file.flush()
+                checkpoint["trace_offset"] = trace_file.tell()
+            checkpoint["iteration"] += 1
+            checkpoint["runtime_accumulated"] = row[7]
+            checkpoint["offset"] = output_file.tell()
+            checkpoint["pending"] = 0
+            checkpoint["trace_pending"] = 0
+            writeCheckpoint(checkpoint_filename, checkpoint)
+
+        checkpoint["complete"] = True
+        writeCheckpoint(checkpoint_filename, checkpoint)
 
 
 if __name__ == '__main__':
@@ -356,6 +1146,9 @@ if __name__ == '__main__':
     approximation_tolerance = 0.05
     group_seed = None
     random_allocation_seed = None
+    backend_name = "gurobi"
+    allocation = "exact"
+    workers = 1
 
     # Parse command line arguments
     parser = ArgumentParser()
@@ -371,6 +1164,11 @@ if __name__ == '__main__':
     parser.add_argument("-g", "--groupseed", default=group_seed)
     parser.add_argument("-r", "--randomallocationseed", default=random_allocation_seed)
     parser.add_argument("-c", "--countseeder", action="store_true")
+    parser.add_argument("-b", "--backend", default=backend_name, choices=sorted(BACKENDS.keys()))
+    parser.add_argument("-m", "--allocation", default=allocation, choices=ALLOCATIONS)
+    parser.add_argument("-j", "--workers", default=workers, type=int)
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument("--profile", action="store_true")
 
     args = parser.parse_args()
     path = args.path
@@ -378,6 +1176,7 @@ if __name__ == '__main__':
     output = args.output
     advertisers_filename = args.advertisers
     iterations = args.iterations
+    workers = args.workers
     approximation_tolerance = float(args.tolerance)
     group_seed = int(args.groupseed)
     random_allocation_seed = int(args.randomallocationseed)
@@ -393,9 +1192,13 @@ if __name__ == '__main__':
     count_seeder = False
     if args.countseeder:
         count_seeder = True
+    # the MILP backend is only needed (and its solver only imported) in extended mode
+    backend = None
+    if extended:
+        backend = getBackend(args.backend, args.allocation)
 
     # Create advertisers from file
     advertisers_list = loadData(path, spread_filename, advertisers_filename, count_seeder)
 
     # Run auction
-    runAuction(advertisers_list, output, approximation_tolerance, group_seed, random_allocation_seed, weighted, extended, count_seeder, non_truthful, iterations)
+    runAuction(advertisers_list, spread_filename, advertisers_filename, output, approximation_tolerance, group_seed, random_allocation_seed, weighted, extended, non_truthful, iterations, backend, workers, args.resume, args.profile, path, count_seeder)
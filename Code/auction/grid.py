@@ -0,0 +1,129 @@
+import json
+import itertools
+import concurrent.futures
+from argparse import ArgumentParser
+from auction.auction import loadData
+from auction.auction import getBackend
+from auction.auction import getResultRows
+from auction.auction import writeResultRows
+
+# Options of a run that are not given by the sweep file, named like the command line options of auction.py
+DEFAULTS = {
+    "path": "Data/Synthetic/",
+    "spread": "influence=random(0,2000)_n=100.csv",
+    "advertisers": "value=random(0,1)_b=5000_n=100.csv",
+    "iterations": 1,
+    "output": "Data/Results/results.csv",
+    "tolerance": 0.05,
+    "groupseed": None,
+    "randomallocationseed": None,
+    "weighted": False,
+    "extended": False,
+    "nontruthful": False,
+    "countseeder": False,
+    "backend": "gurobi",
+    "allocation": "exact",
+}
+
+
+#%%
+def expandSweep(sweep):
+    """Return the runs of a sweep as a list of option dicts.
+
+    The sweep is a dict with the keys "inputs", "modes" and "seeds" and any option of DEFAULTS. Every input is
+    a dict with a path, an advertisers file and one or more spread files, every mode a dict of options and every
+    seed a pair of group and random allocation seed. The runs are the product of inputs, spread files, modes and
+    seeds, in this order.
+    """
+    options = dict(DEFAULTS)
+    options.update({key: value for key, value in sweep.items() if key not in ("inputs", "modes", "seeds")})
+
+    inputs = sweep.get("inputs", [{}])
+    modes = sweep.get("modes", [{}])
+    seeds = sweep.get("seeds", [(options["groupseed"], options["randomallocationseed"])])
+
+    runs = []
+    for run_input in inputs:
+        spreads = run_input.get("spread", options["spread"])
+        if isinstance(spreads, str):
+            spreads = [spreads]
+        for spread, mode, (group_seed, random_allocation_seed) in itertools.product(spreads, modes, seeds):
+            run = dict(options)
+            run.update(run_input)
+            run.update(mode)
+            run["spread"] = spread
+            run["groupseed"] = group_seed
+            run["randomallocationseed"] = random_allocation_seed
+            runs.append(run)
+    return runs
+
+
+def getInputKey(run):
+    return run["path"], run["spread"], run["advertisers"], run["countseeder"]
+
+
+def loadInputs(runs):
+    # every distinct input is read only once, whatever the number of modes and seeds run on it
+    inputs = {}
+    for run in runs:
+        key = getInputKey(run)
+        if key not in inputs:
+            inputs[key] = loadData(*key)
+    return inputs
+
+
+def getRunRows(inputs, run):
+    backend = None
+    if run["extended"]:
+        backend = getBackend(run["backend"], run["allocation"])
+    return getResultRows(inputs[getInputKey(run)], run["spread"], run["advertisers"], float(run["tolerance"]), run["groupseed"], run["randomallocationseed"], run["weighted"], run["extended"], run["nontruthful"], run["iterations"], backend)
+
+
+# Inputs shared by all runs of a worker process, set once by the pool initializer
+worker_inputs = None
+
+
+def initializeWorker(inputs):
+    global worker_inputs
+    worker_inputs = inputs
+
+
+def runWorker(run):
+    return getRunRows(worker_inputs, run)
+
+
+def runSweep(sweep, workers=1):
+    runs = expandSweep(sweep)
+    inputs = loadInputs(runs)
+
+    if workers > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(workers, initializer=initializeWorker, initargs=(inputs,))
+        results = executor.map(runWorker, runs)
+    else:
+        executor = None
+        results = (getRunRows(inputs, run) for run in runs)
+
+    # rows are written in the order of the runs, as soon as a run and all runs before it are done
+    try:
+        for run, rows in zip(runs, results):
+            writeResultRows(run["output"], rows)
+    finally:
+        # also when a run or a write fails, without waiting for the runs not started yet
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+if __name__ == '__main__':
+
+    # Parse command line arguments
+    parser = ArgumentParser()
+    parser.add_argument("sweep")
+    parser.add_argument("-j", "--workers", default=1, type=int)
+
+    args = parser.parse_args()
+
+    with open(args.sweep) as sweep_file:
+        sweep = json.load(sweep_file)
+
+    # Run all auctions of the sweep
+    runSweep(sweep, args.workers)
@@ -0,0 +1,220 @@
+import os.path
+import sys
+import json
+import time
+import platform
+import statistics
+import tracemalloc
+import numpy as np
+from argparse import ArgumentParser
+from auction.auction import loadData
+from auction.auction import maximizeGroupRevenueWeighted
+from auction.auction import maximizeGroupRevenueUnweighted
+from auction.auction import maximizeGroupRevenueExtended
+from auction.auction import PriceTable
+from auction.auction import allocateRandom
+from auction.auction import allocateExtended
+from auction.auction import getBackend
+from auction.auction import ALLOCATIONS
+from auction.auction import BACKENDS
+
+try:
+    import resource
+except ImportError:  # not available on Windows, peak RSS is not reported there
+    resource = None
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Inputs of the benchmark: name, directory, spread file, advertisers file
+INPUTS = [("Synthetic n=%d" % n, "Synthetic", "influence=random(0,2000)_n=%d.csv" % n, "value=random(0,1)_b=5000_n=%d.csv" % n) for n in (10, 50, 100, 500, 1000)] + [
+    ("Digg", "Digg", "influence_10_iterations_top.csv", "value=random(0.5,2).csv"),
+    ("Flixster", "Flixster", "influence_10_iterations_top.csv", "value=random(0.5,2).csv"),
+]
+
+# Inputs with more advertisers get no extended cases by default, maximizeGroupRevenueExtended takes minutes on them
+EXTENDED_MAX_ADVERTISERS = 100
+
+# Latency differences below this many seconds are timer noise and never count as a regression
+MIN_TIME_DIFFERENCE = 0.00005
+
+
+#%%
+def measure(function, repeats, time_limit):
+    """Time function and return its calls, throughput, median and 95th percentile latency and peak memory.
+
+    function is called once to warm up, then timed repeats times or until time_limit seconds have passed,
+    but at least 5 times. A function whose warm-up call alone takes longer than time_limit, like the
+    extended variants on large inputs, is only timed by that call. The peak memory allocated during one
+    more call is traced separately, so tracing does not slow down the timed calls.
+    """
+    call_start = time.perf_counter()
+    function()
+    latencies = [time.perf_counter() - call_start]
+
+    if latencies[0] <= time_limit:
+        latencies = []
+        start = time.perf_counter()
+        while len(latencies) < repeats and (len(latencies) < 5 or time.perf_counter() - start < time_limit):
+            call_start = time.perf_counter()
+            function()
+            latencies.append(time.perf_counter() - call_start)
+
+    tracemalloc.start()
+    function()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "throughput": len(latencies) / sum(latencies),
+        "p50": statistics.median(latencies),
+        "p95": latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))],
+        "peak_memory": peak_memory,
+    }
+
+
+def getCases(data_path, backend_name, allocation="approximate", extended=True, extended_limit=EXTENDED_MAX_ADVERTISERS):
+    """Return the benchmark cases as a list of (name, function) pairs.
+
+    The extended variants are only added if extended, and for inputs of at most extended_limit advertisers
+    unless extended_limit is 0.
+    """
+    cases = []
+    for input_name, directory, spread_filename, advertisers_filename in INPUTS:
+        path = os.path.join(data_path, directory) + os.sep
+        advertisers_list = loadData(path, spread_filename, advertisers_filename, True)
+
+        # one fixed group split, as drawn by runIteration
+        advertisers_list = list(advertisers_list)
+        np.random.RandomState(0).shuffle(advertisers_list)
+        advertisers_a = advertisers_list[:len(advertisers_list) // 2]
+        advertisers_b = advertisers_list[len(advertisers_list) // 2:]
+
+        value_per_engagement_a, value_a = maximizeGroupRevenueWeighted(list(advertisers_a))
+        value_per_engagement_b, value_b = maximizeGroupRevenueWeighted(list(advertisers_b))
+        price_table = PriceTable(advertisers_a, advertisers_b, True, False)
+        price_table.setReserves(value_per_engagement_a, value_per_engagement_b, value_a, value_b)
+
+        cases.append((input_name + "/loadData", lambda path=path, spread_filename=spread_filename, advertisers_filename=advertisers_filename: loadData(path, spread_filename, advertisers_filename, True, False)))
+        cases.append((input_name + "/loadData (cached)", lambda path=path, spread_filename=spread_filename, advertisers_filename=advertisers_filename: loadData(path, spread_filename, advertisers_filename, True)))
+        cases.append((input_name + "/maximizeGroupRevenueWeighted", lambda group=advertisers_a: maximizeGroupRevenueWeighted(list(group))))
+        cases.append((input_name + "/maximizeGroupRevenueUnweighted", lambda group=advertisers_a: maximizeGroupRevenueUnweighted(list(group))))
+        cases.append((input_name + "/allocateRandom", lambda price_table=price_table: allocateRandom(price_table, np.random.RandomState(0))))
+
+        if extended and (extended_limit == 0 or len(advertisers_list) <= extended_limit):
+            backend = getBackend(backend_name, allocation)
+            cases.append((input_name + "/maximizeGroupRevenueExtended", lambda group=advertisers_a, backend=backend: maximizeGroupRevenueExtended(list(group), True, 0.05, backend)))
+            cases.append((input_name + "/allocateExtended", lambda price_table=price_table, backend=backend: allocateExtended(price_table, 0.05, backend)))
+
+    return cases
+
+
+def getPeakRss():
+    # kilobytes on Linux, bytes on macOS, reported in bytes
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        peak_rss *= 1024
+    return peak_rss
+
+
+def runBenchmark(data_path, backend_name, repeats, time_limit, case_filter, allocation="approximate", extended=True, extended_limit=EXTENDED_MAX_ADVERTISERS):
+    results = {}
+    for name, function in getCases(data_path, backend_name, allocation, extended, extended_limit):
+        if case_filter and case_filter not in name:
+            continue
+        results[name] = measure(function, repeats, time_limit)
+        print("%-60s p50 %10.6fs  p95 %10.6fs  %10.1f calls/s  %10d bytes" % (name, results[name]["p50"], results[name]["p95"], results[name]["throughput"], results[name]["peak_memory"]))
+
+    peak_rss = None
+    if resource is not None:
+        peak_rss = getPeakRss()
+
+    return {"machine": platform.machine(), "platform": platform.platform(), "python": platform.python_version(), "numpy": np.__version__,
+            "backend": backend_name, "allocation": allocation, "peak_rss": peak_rss, "cases": results}
+
+
+def compareToBaseline(results, baseline, time_tolerance, memory_tolerance):
+    """Return the regressions of results against baseline as a list of messages.
+
+    A case regresses if its median latency grew by more than time_tolerance or its peak memory by
+    more than memory_tolerance, both relative to the baseline, and latency grew by at least
+    MIN_TIME_DIFFERENCE. Cases missing on either side are skipped. The peak RSS of the whole run regresses
+    if it grew by more than memory_tolerance, as long as both runs measured the same cases.
+    """
+    regressions = []
+    if results.get("peak_rss") and baseline.get("peak_rss") and set(results["cases"]) == set(baseline["cases"]):
+        if results["peak_rss"] > baseline["peak_rss"] * (1 + memory_tolerance):
+            regressions.append("peak RSS %d bytes, baseline %d bytes" % (results["peak_rss"], baseline["peak_rss"]))
+    for name, case in results["cases"].items():
+        if name not in baseline["cases"]:
+            continue
+        baseline_case = baseline["cases"][name]
+        if case["p50"] > baseline_case["p50"] * (1 + time_tolerance) and case["p50"] - baseline_case["p50"] >= MIN_TIME_DIFFERENCE:
+            regressions.append("%s: median latency %.6fs, baseline %.6fs" % (name, case["p50"], baseline_case["p50"]))
+        if case["peak_memory"] > baseline_case["peak_memory"] * (1 + memory_tolerance):
+            regressions.append("%s: peak memory %d bytes, baseline %d bytes" % (name, case["peak_memory"], baseline_case["peak_memory"]))
+    return regressions
+
+
+if __name__ == '__main__':
+
+    # Set defaults
+    output = "benchmark.json"
+    repeats = 50
+    time_limit = 2.0
+    time_tolerance = 0.5
+    memory_tolerance = 0.25
+    backend_name = "highs"
+    # the exact allocation takes seconds per extended case even on 100 advertisers
+    allocation = "approximate"
+    extended_limit = EXTENDED_MAX_ADVERTISERS
+
+    # Parse command line arguments
+    parser = ArgumentParser()
+    parser.add_argument("-p", "--path", default=DATA_PATH)
+    parser.add_argument("-o", "--output", default=output)
+    parser.add_argument("-c", "--baseline", default=BASELINE)
+    parser.add_argument("-s", "--savebaseline", action="store_true")
+    parser.add_argument("-r", "--repeats", default=repeats, type=int)
+    parser.add_argument("-l", "--timelimit", default=time_limit, type=float)
+    parser.add_argument("-t", "--timetolerance", default=time_tolerance, type=float)
+    parser.add_argument("-m", "--memorytolerance", default=memory_tolerance, type=float)
+    parser.add_argument("-b", "--backend", default=backend_name, choices=sorted(BACKENDS))
+    parser.add_argument("-a", "--allocation", default=allocation, choices=ALLOCATIONS)
+    parser.add_argument("-k", "--filter", default="")
+    parser.add_argument("-x", "--extendedlimit", default=extended_limit, type=int)
+    parser.add_argument("--noextended", action="store_true")
+
+    args = parser.parse_args()
+
+    results = runBenchmark(args.path, args.backend, args.repeats, args.timelimit, args.filter, args.allocation, not args.noextended, args.extendedlimit)
+
+    with open(args.output, 'w') as output_file:
+        json.dump(results, output_file, indent=2)
+
+    if args.savebaseline:
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print("No baseline at %s, run with -s to store one" % args.baseline)
+        sys.exit(0)
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+
+    # timings are only comparable on the machine the baseline was stored on
+    if baseline.get("platform") != results["platform"] or baseline.get("python") != results["python"]:
+        print("Baseline %s was stored on %s with Python %s, timings may not be comparable" % (args.baseline, baseline.get("platform"), baseline.get("python")))
+    if baseline.get("backend") != results["backend"] or baseline.get("allocation", "exact") != results["allocation"]:
+        print("Baseline %s was stored with backend %s and %s allocation, the extended cases are not comparable" % (args.baseline, baseline.get("backend"), baseline.get("allocation", "exact")))
+
+    regressions = compareToBaseline(results, baseline, args.timetolerance, args.memorytolerance)
+    for regression in regressions:
+        print("Regression: " + regression)
+    if regressions:
+        sys.exit(1)
+    print("No regressions against %s" % args.baseline)
@@ -0,0 +1,31 @@
+import os
+import json
+import numpy as np
+
+
+def getFileKey(filename):
+    # a file is identified by its absolute path, size and modification time
+    source = os.path.abspath(filename)
+    status = os.stat(source)
+    return {source: [status.st_size, status.st_mtime_ns]}
+
+
+def openCache(cache_directory):
+    # the key is removed first and written last, so a cache is only used once all of its arrays are complete
+    os.makedirs(cache_directory, exist_ok=True)
+    key_filename = os.path.join(cache_directory, "key.json")
+    if os.path.exists(key_filename):
+        os.remove(key_filename)
+
+
+def saveArray(cache_directory, name, array):
+    with open(os.path.join(cache_directory, name + ".tmp"), 'wb') as array_file:
+        np.save(array_file, np.asarray(array))
+    os.replace(os.path.join(cache_directory, name + ".tmp"), os.path.join(cache_directory, name + ".npy"))
+
+
+def commitCache(cache_directory, key):
+    key_filename = os.path.join(cache_directory, "key.json")
+    with open(key_filename + ".tmp", 'w') as key_file:
+        json.dump(key, key_file)
+    os.replace(key_filename + ".tmp", key_filename)
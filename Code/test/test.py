@@ -1,4 +1,16 @@
 import unittest
+import os
+import csv
+import json
+import io
+import contextlib
+import random
+import multiprocessing
+import time
+import unittest.mock
+import tempfile
+import numpy as np
+import auction.auction
 from auction.auction import Advertiser
 from auction.auction import maximizeGroupRevenueWeighted
 from auction.auction import allocateExtended
@@ -6,6 +18,44 @@ from auction.auction import maximizeGroupRevenueExtended
 from auction.auction import maximizeGroupRevenueUnweighted
 from auction.auction import getPrice
 from auction.auction import allocateRandom
+from auction.auction import Dataset
+from auction.auction import getSpreadMatrix
+from auction.auction import sortAdvertisers
+from auction.auction import PriceTable
+from auction.auction import GurobiPrefixSolver
+from auction.auction import GurobiBackend
+from auction.auction import HighsBackend
+from auction.auction import ApproximateBackend
+from auction.auction import VerifiedBackend
+from auction.auction import getAssignmentProblem
+from auction.auction import runIteration
+from auction.auction import runAuction
+from auction.auction import loadData
+from auction.grid import expandSweep
+from auction.grid import runSweep
+from auction.grid import getRunRows
+from benchmark.benchmark import compareToBaseline
+from util.createSynthetic import createSynthetic
+from util.createTIC import createTIC
+from util.selectSeeders import getRandomNodes
+from util.selectSeeders import getTopNodes
+from util.graph import loadGraph
+from util.graph import getGraphDirectory
+from util.simulateInfluence import getInfluence
+from util.simulateInfluence import simulateInfluence
+from util.simulateInfluence import simulateAll
+from util.simulateInfluence import simulateWorlds
+from util.simulateInfluence import simulateSeeders
+from util.simulateInfluence import StoppingRule
+from util.simulateInfluence import getOutputName
+from util.greedySeeders import SpreadEstimator
+from util.greedySeeders import selectGreedy
+from util.estimateSpreads import getReverseGraph
+from util.estimateSpreads import estimateSpreads
+from util.estimateSpreads import sampleReachableSets
+from auction.auction import readCache
+from auction.auction import getCacheKey
+from auction.auction import getCacheDirectory
 
 class MaximizeGroupRevenueWeightedTest(unittest.TestCase):
 
@@ -89,9 +139,19 @@ class MaximizeGroupRevenueUnweightedTest(unittest.TestCase):
         self.assertEqual(2000, value)
 
 
+def createBackend(test, backend_class):
+    try:
+        return backend_class()
+    except ImportError as error:
+        test.skipTest(str(error))
+
+
 class MaximizeGroupRevenueExtendedTest(unittest.TestCase):
 
+    backend_class = GurobiBackend
+
     def setUp(self):
+        self.backend = createBackend(self, self.backend_class)
         self.a1_1 = Advertiser(1, 200, {'s1': 300, 's2': 80})
         self.a1_2 = Advertiser(1, 200, {'s1': 300, 's2': 100})
         self.a1_3 = Advertiser(2, 200, {'s1': 300, 's2': 100})
@@ -106,7 +166,7 @@ class MaximizeGroupRevenueExtendedTest(unittest.TestCase):
         # arrange
         advertisers = [self.a1_1, self.a2_1]
         # act
-        value_per_engagement, value = maximizeGroupRevenueExtended(advertisers, False, 1)
+        value_per_engagement, value = maximizeGroupRevenueExtended(advertisers, False, 1, self.backend)
         # assert
         self.assertEqual(2, value_per_engagement)
         self.assertEqual(800, value)
@@ -116,7 +176,7 @@ class MaximizeGroupRevenueExtendedTest(unittest.TestCase):
         # arrange
         advertisers = [self.a1_2, self.a2_2]
         # act
-        value_per_engagement, value = maximizeGroupRevenueExtended(advertisers, False, 1)
+        value_per_engagement, value = maximizeGroupRevenueExtended(advertisers, False, 1, self.backend)
         # assert
         self.assertEqual(1, value_per_engagement)
         self.assertEqual(400, value)
@@ -126,25 +186,33 @@ class MaximizeGroupRevenueExtendedTest(unittest.TestCase):
         # arrange
         advertisers = [self.a1_3, self.a2_3]
         # act
-        value_per_engagement, value = maximizeGroupRevenueExtended(advertisers, False, 1)
-        # assert
+        value_per_engagement, value = maximizeGroupRevenueExtended(advertisers, False, 1, self.backend)
+        # assert: the tie in value per engagement keeps the input order, so every prefix ends at a2_3 or its duplicate
         self.assertEqual(2, value_per_engagement)
-        self.assertEqual(800, value)
+        self.assertEqual(600, value)
 
 
     def testAllocateBothWeighted(self):
         # arrange
         advertisers = [self.a1_4, self.a2_4]
         # act
-        value_per_engagement, value = maximizeGroupRevenueExtended(advertisers, False, 1)
+        value_per_engagement, value = maximizeGroupRevenueExtended(advertisers, False, 1, self.backend)
         # assert
         self.assertEqual(2, value_per_engagement)
         self.assertEqual(400, value)
 
 
+class MaximizeGroupRevenueExtendedHighsTest(MaximizeGroupRevenueExtendedTest):
+
+    backend_class = HighsBackend
+
+
 class AllocateExtendedTest(unittest.TestCase):
 
+    backend_class = GurobiBackend
+
     def setUp(self):
+        self.backend = createBackend(self, self.backend_class)
         self.a1 = Advertiser(1, 200, {'s1': 300, 's2': 100, 's3': 10})
         self.a2 = Advertiser(2, 150, {'s1': 100, 's2': 300, 's3': 10})
         self.b1 = Advertiser(3, 200, {'s1': 115, 's2': 100, 's3': 60})
@@ -156,7 +224,9 @@ class AllocateExtendedTest(unittest.TestCase):
         advertisers_a = [self.a1, self.a2]
         advertisers_b = [self.b1, self.b2]
         # act
-        revenue, _ = allocateExtended(advertisers_a, advertisers_b, 2, 1, 0, 0, False, False, 1)
+        price_table = PriceTable(advertisers_a, advertisers_b, False, False)
+        price_table.setReserves(2, 1, 0, 0)
+        revenue, _, _ = allocateExtended(price_table, 1, self.backend)
         # assert
         self.assertAlmostEqual(450, revenue, places=4)
 
@@ -166,7 +236,9 @@ class AllocateExtendedTest(unittest.TestCase):
         advertisers_a = [self.a1, self.a2]
         advertisers_b = [self.b1, self.b2]
         # act
-        revenue, _ = allocateExtended(advertisers_a, advertisers_b, 0, 0, 550, 410, True, False, 1)
+        price_table = PriceTable(advertisers_a, advertisers_b, True, False)
+        price_table.setReserves(0, 0, 550, 410)
+        revenue, _, _ = allocateExtended(price_table, 1, self.backend)
         # assert
         self.assertAlmostEqual(450, revenue, places=4)
 
@@ -176,7 +248,9 @@ class AllocateExtendedTest(unittest.TestCase):
         advertisers_a = [self.a1, self.a2]
         advertisers_b = [self.b1, self.b2]
         # act
-        revenue, _ = allocateExtended(advertisers_a, advertisers_b, 1, 2, 0, 0, False, True, 1)
+        price_table = PriceTable(advertisers_a, advertisers_b, False, True)
+        price_table.setReserves(1, 2, 0, 0)
+        revenue, _, _ = allocateExtended(price_table, 1, self.backend)
         # assert
         self.assertAlmostEqual(450, revenue, places=4)
 
@@ -186,11 +260,116 @@ class AllocateExtendedTest(unittest.TestCase):
         advertisers_a = [self.a1, self.a2]
         advertisers_b = [self.b1, self.b2]
         # act
-        revenue, _ = allocateExtended(advertisers_a, advertisers_b, 0, 0, 410, 550, True, True, 1)
+        price_table = PriceTable(advertisers_a, advertisers_b, True, True)
+        price_table.setReserves(0, 0, 410, 550)
+        revenue, _, _ = allocateExtended(price_table, 1, self.backend)
         # assert
         self.assertAlmostEqual(450, revenue, places=4)
 
 
+class AllocateExtendedHighsTest(AllocateExtendedTest):
+
+    backend_class = HighsBackend
+
+
+class AllocateExtendedApproximateTest(AllocateExtendedTest):
+
+    backend_class = ApproximateBackend
+
+
+    def testGap(self):
+        # arrange
+        price_table = PriceTable([self.a1, self.a2], [self.b1, self.b2], False, False)
+        price_table.setReserves(2, 1, 0, 0)
+        # act
+        revenue, _, upper_bound = allocateExtended(price_table, 1, self.backend)
+        # assert
+        self.assertGreaterEqual(upper_bound, revenue)
+        self.assertGreaterEqual(upper_bound, 450 - 0.0001)
+
+
+    def testNoOutput(self):
+        # arrange
+        advertisers = [Advertiser(i + 1, 100 * (i + 1), {'s1': 10 * i, 's2': 50, 's3': 100 - 10 * i}) for i in range(6)]
+        output = io.StringIO()
+        # act
+        with contextlib.redirect_stdout(output):
+            maximizeGroupRevenueExtended(advertisers, False, 1, self.backend)
+        # assert
+        self.assertEqual("", output.getvalue())
+
+
+class AllocateExtendedVerifiedTest(AllocateExtendedTest):
+
+    def backend_class(self):
+        return VerifiedBackend(HighsBackend())
+
+
+    def testFallsBackToExact(self):
+        # arrange
+        # the rounding takes s3 first and can not reach the optimum of s1 and s2
+        advertisers = [Advertiser(1, 6, {'s1': 3, 's2': 3, 's3': 4})]
+        price_table = PriceTable(advertisers, [], False, False)
+        price_table.setReserves(0, 1, 0, 0)
+        # act
+        revenue, _, _ = allocateExtended(price_table, 0, self.backend)
+        # assert
+        self.assertAlmostEqual(6, revenue, places=4)
+
+
+    def testTighterBound(self):
+        # arrange
+        advertisers = [Advertiser(1, 6, {'s1': 3, 's2': 3, 's3': 4})]
+        price_table = PriceTable(advertisers, [], False, False)
+        price_table.setReserves(0, 1, 0, 0)
+        # act
+        _, _, upper_bound = allocateExtended(price_table, 0, self.backend)
+        # assert: the exact solve proves the optimum, the LP bound is 7
+        self.assertAlmostEqual(6, upper_bound, places=4)
+
+
+class GetAssignmentProblemTest(unittest.TestCase):
+
+    def testMatrices(self):
+        # arrange
+        advertisers_a = [Advertiser(1, 200, {'s1': 300, 's2': 100}), Advertiser(3, 50, {'s1': 10, 's2': 20})]
+        advertisers_b = [Advertiser(2, 150, {'s1': 100, 's2': 300})]
+        price_table = PriceTable(advertisers_a, advertisers_b, False, False)
+        price_table.setReserves(1, 2, 0, 0)
+        # act
+        eligible_rows, payments, seeder_matrix, budget_matrix = getAssignmentProblem(price_table)
+        # assert
+        self.assertEqual([1, 2], eligible_rows.tolist())
+        self.assertEqual([[20, 40], [100, 300]], payments.tolist())
+        self.assertEqual([[1, 1, 0, 0], [0, 0, 1, 1]], seeder_matrix.toarray().tolist())
+        self.assertEqual([[20, 0, 40, 0], [0, 100, 0, 300]], budget_matrix.toarray().tolist())
+
+
+class GurobiPrefixSolverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = createBackend(self, GurobiBackend)
+        self.advertisers = [Advertiser(4, 150, {'s1': 100, 's2': 100, 's3': 75}),
+                            Advertiser(3, 200, {'s1': 115, 's2': 100, 's3': 60}),
+                            Advertiser(2, 150, {'s1': 100, 's2': 300, 's3': 10}),
+                            Advertiser(1, 200, {'s1': 300, 's2': 100, 's3': 10})]
+
+
+    def testMatchesAllocateExtended(self):
+        for weighted in [True, False]:
+            # arrange
+            price_table = PriceTable(self.advertisers, [], weighted, False)
+            prefix_solver = GurobiPrefixSolver(price_table, 0)
+            reserves = price_table.values() if weighted else price_table.values_per_engagement
+            for size in range(1, len(self.advertisers) + 1):
+                price_table.setReserves(0, price_table.values_per_engagement[size - 1], 0, reserves[size - 1])
+                # act
+                revenue = prefix_solver.solve(size, reserves[size - 1])
+                # assert
+                expected_revenue, _, _ = allocateExtended(price_table.prefix(size), 0, self.backend)
+                self.assertAlmostEqual(expected_revenue, revenue, places=4)
+
+
 class GetPriceTest(unittest.TestCase):
 
     def setUp(self):
@@ -236,6 +415,37 @@ class GetPriceTest(unittest.TestCase):
         self.assertAlmostEqual(20, price_b, places=4)
 
 
+class PriceTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.advertisers_a = [Advertiser(1, 200, {'s1': 300, 's2': 100, 's3': 100}), Advertiser(25, 200, {'s1': 0, 's2': 0, 's3': 0})]
+        self.advertisers_b = [Advertiser(1, 200, {'s1': 30, 's2': 10, 's3': 10}), Advertiser(0.7, 200, {'s1': 0.1, 's2': 0.2, 's3': 0.3})]
+
+
+    def testMatchesGetPrice(self):
+        for weighted in [True, False]:
+            for non_truthful in [True, False]:
+                # act
+                price_table = PriceTable(self.advertisers_a, self.advertisers_b, weighted, non_truthful)
+                price_table.setReserves(10, 20, 300, 400)
+                # assert
+                for row, advertiser in enumerate(self.advertisers_a + self.advertisers_b):
+                    price = getPrice(advertiser, 300, 400, 10, 20, self.advertisers_a, self.advertisers_b, weighted, non_truthful)
+                    self.assertEqual(price, price_table.prices[row])
+                    self.assertEqual(price <= advertiser.value_per_engagement + 0.00001, price_table.eligible[row])
+
+
+    def testPrefix(self):
+        # arrange
+        price_table = PriceTable(self.advertisers_a + self.advertisers_b, [], True, False)
+        price_table.setReserves(0, 0, 0, 60)
+        # act
+        prefix = price_table.prefix(2)
+        # assert
+        self.assertEqual(2, len(prefix.advertisers))
+        self.assertEqual([0.12, 0], prefix.prices.tolist())
+
+
 class AllocateRandomTest(unittest.TestCase):
 
     def setUp(self):
@@ -250,7 +460,9 @@ class AllocateRandomTest(unittest.TestCase):
         advertisers_a = [self.a1_1, self.a1_2]
         advertisers_b = [self.b1_1, self.b1_2]
         # act
-        revenue, _ = allocateRandom(advertisers_a, advertisers_b, 2.5, 3.5, 400, 600, True, False)
+        price_table = PriceTable(advertisers_a, advertisers_b, True, False)
+        price_table.setReserves(2.5, 3.5, 400, 600)
+        revenue, _ = allocateRandom(price_table, np.random.RandomState(0))
         # assert
         self.assertAlmostEqual(500, revenue, places=4)
     
@@ -260,7 +472,9 @@ class AllocateRandomTest(unittest.TestCase):
         advertisers_a = [self.a1_1, self.a1_2]
         advertisers_b = [self.b1_1, self.b1_2]
         # act
-        revenue, _ = allocateRandom(advertisers_a, advertisers_b, 2.5, 3.5, 400, 600, False, False)
+        price_table = PriceTable(advertisers_a, advertisers_b, False, False)
+        price_table.setReserves(2.5, 3.5, 400, 600)
+        revenue, _ = allocateRandom(price_table, np.random.RandomState(0))
         # assert
         self.assertAlmostEqual(600, revenue, places=4)
 
@@ -270,7 +484,9 @@ class AllocateRandomTest(unittest.TestCase):
         advertisers_a = [self.a1_1, self.a1_2]
         advertisers_b = [self.b1_1, self.b1_2]
         # act
-        revenue, _ = allocateRandom(advertisers_a, advertisers_b, 3.5, 2.5, 600, 400, True, True)
+        price_table = PriceTable(advertisers_a, advertisers_b, True, True)
+        price_table.setReserves(3.5, 2.5, 600, 400)
+        revenue, _ = allocateRandom(price_table, np.random.RandomState(0))
         # assert
         self.assertAlmostEqual(500, revenue, places=4)
     
@@ -280,10 +496,879 @@ class AllocateRandomTest(unittest.TestCase):
         advertisers_a = [self.a1_1, self.a1_2]
         advertisers_b = [self.b1_1, self.b1_2]
         # act
-        revenue, _ = allocateRandom(advertisers_a, advertisers_b, 3.5, 2.5, 600, 400, False, True)
+        price_table = PriceTable(advertisers_a, advertisers_b, False, True)
+        price_table.setReserves(3.5, 2.5, 600, 400)
+        revenue, _ = allocateRandom(price_table, np.random.RandomState(0))
         # assert
         self.assertAlmostEqual(600, revenue, places=4)
 
 
+class RunIterationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.advertisers_list = [Advertiser(i + 1, 100 * (i + 1), {'s1': 10 * i, 's2': 50, 's3': 100 - 10 * i}) for i in range(6)]
+
+
+    def runIteration(self, iteration):
+        return runIteration(self.advertisers_list, 0.05, 1, 2, False, False, False, None, iteration)[:2]
+
+
+    def testIndependentOfIterationOrder(self):
+        # arrange
+        sequential = [self.runIteration(i) for i in range(4)]
+        # act
+        reversed_order = [self.runIteration(i) for i in reversed(range(4))]
+        # assert
+        self.assertEqual(sequential, list(reversed(reversed_order)))
+
+
+    def testProfile(self):
+        # act
+        _, _, _, trace = runIteration(self.advertisers_list, 0.05, 1, 2, True, True, False, HighsBackend(), 0, True)
+        # assert
+        self.assertEqual(1, trace["phases"]["allocation"]["calls"])
+        self.assertEqual(len(trace["mips"]), trace["phases"]["group_revenue/solve"]["calls"] + trace["phases"]["allocation/solve"]["calls"])
+        self.assertEqual("allocation", trace["mips"][-1]["phase"])
+        self.assertGreaterEqual(trace["allocation"]["upper_bound"], trace["allocation"]["revenue"] - 0.0001)
+        self.assertIsNone(auction.auction.current_profile)
+
+
+    def testProfileApproximateAllocation(self):
+        # arrange
+        output = io.StringIO()
+        # act
+        with contextlib.redirect_stdout(output):
+            revenue, _, _, trace = runIteration(self.advertisers_list, 0.05, 1, 2, True, True, False, ApproximateBackend(), 0, True)
+        # assert: the gap of the allocation is traced, nothing is printed
+        self.assertEqual("", output.getvalue())
+        self.assertEqual(revenue, trace["allocation"]["revenue"])
+        self.assertAlmostEqual((trace["allocation"]["upper_bound"] - revenue) / trace["allocation"]["upper_bound"], trace["allocation"]["gap"], places=6)
+
+
+    def testNoProfile(self):
+        # act
+        _, _, _, trace = runIteration(self.advertisers_list, 0.05, 1, 2, False, False, False, None, 0)
+        # assert
+        self.assertIsNone(trace)
+
+
+    def testKeepsAdvertiserOrder(self):
+        # arrange
+        advertisers_list = list(self.advertisers_list)
+        # act
+        self.runIteration(0)
+        # assert
+        self.assertEqual(advertisers_list, self.advertisers_list)
+
+
+class RunAuctionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.advertisers_list = [Advertiser(i + 1, 100 * (i + 1), {'s1': 10 * i, 's2': 50, 's3': 100 - 10 * i}) for i in range(6)]
+        self.directory = tempfile.TemporaryDirectory()
+
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+    def runAuction(self, output, resume):
+        runAuction(self.advertisers_list, "spread.csv", "advertisers.csv", output, 0.05, 1, 2, True, False, False, 5, None, 1, resume)
+
+
+    def readRows(self, output):
+        with open(output, newline='') as output_file:
+            return [row[:7] + row[9:] for row in csv.reader(output_file)]
+
+
+    def testResume(self):
+        # arrange
+        output = os.path.join(self.directory.name, "results.csv")
+        interrupted_output = os.path.join(self.directory.name, "interrupted.csv")
+        self.runAuction(output, False)
+        self.runAuction(interrupted_output, False)
+        # rewind the output and its checkpoint to iteration 2, as if the run had died while writing the third row
+        checkpoint_filename = [name for name in os.listdir(self.directory.name) if name.startswith("interrupted.csv.")][0]
+        checkpoint_filename = os.path.join(self.directory.name, checkpoint_filename)
+        with open(checkpoint_filename) as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+        with open(interrupted_output, newline='') as output_file:
+            lines = output_file.readlines()
+        with open(interrupted_output, 'w', newline='') as output_file:
+            output_file.write("".join(lines[:3]) + lines[3][:10])
+        del checkpoint["complete"]
+        checkpoint["iteration"] = 2
+        checkpoint["offset"] = len("".join(lines[:3]))
+        checkpoint["pending"] = len(lines[3])
+        with open(checkpoint_filename, 'w') as checkpoint_file:
+            json.dump(checkpoint, checkpoint_file)
+        # act
+        self.runAuction(interrupted_output, True)
+        # assert
+        self.assertEqual(self.readRows(output), self.readRows(interrupted_output))
+
+
+    def testResumeKeepsRowsOfOtherRuns(self):
+        # arrange
+        output = os.path.join(self.directory.name, "results.csv")
+        self.runAuction(output, False)
+        runAuction(self.advertisers_list, "spread.csv", "advertisers.csv", output, 0.05, 1, 2, False, False, False, 5, None, 1, False)
+        with open(output, newline='') as output_file:
+            lines = output_file.readlines()
+        # act
+        self.runAuction(output, True)
+        # assert
+        with open(output, newline='') as output_file:
+            self.assertEqual(lines, output_file.readlines())
+
+
+    def testCheckpointPerInput(self):
+        # arrange
+        output = os.path.join(self.directory.name, "results.csv")
+        runAuction(self.advertisers_list, "spread.csv", "advertisers.csv", output, 0.05, 1, 2, True, False, False, 5, None, 1, False, False, "Digg/", False)
+        # act
+        runAuction(self.advertisers_list, "spread.csv", "advertisers.csv", output, 0.05, 1, 2, True, False, False, 5, None, 1, True, False, "Flixster/", False)
+        runAuction(self.advertisers_list, "spread.csv", "advertisers.csv", output, 0.05, 1, 2, True, False, False, 5, None, 1, True, False, "Digg/", True)
+        runAuction(self.advertisers_list, "spread.csv", "advertisers.csv", output, 0.05, 1, 2, True, False, False, 5, None, 1, True, False, "Digg/", False)
+        # assert
+        self.assertEqual(16, len(self.readRows(output)))
+        for name in os.listdir(self.directory.name):
+            if name.endswith(".checkpoint"):
+                with open(os.path.join(self.directory.name, name)) as checkpoint_file:
+                    self.assertTrue(json.load(checkpoint_file)["complete"])
+
+
+    def testResumeFinishedRun(self):
+        # arrange
+        output = os.path.join(self.directory.name, "results.csv")
+        self.runAuction(output, False)
+        # act
+        self.runAuction(output, True)
+        # assert
+        self.assertEqual(6, len(self.readRows(output)))
+
+
+class LoadDataTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name + os.sep
+        self.writeFile("spread.csv", "0,7,10\n0,3,20\n1,3,30\n")
+        self.writeFile("advertisers.csv", "1,100\n2,200\n")
+
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+    def writeFile(self, filename, content):
+        with open(self.path + filename, 'w') as output_file:
+            output_file.write(content)
+
+
+    def testCacheMatchesParse(self):
+        # arrange
+        parsed = loadData(self.path, "spread.csv", "advertisers.csv", True, False)
+        # act
+        loadData(self.path, "spread.csv", "advertisers.csv", True)
+        cached = loadData(self.path, "spread.csv", "advertisers.csv", True)
+        # assert
+        self.assertTrue(os.path.isdir(os.path.join(self.path, ".cache")))
+        self.assertEqual([7, 3], cached[0].dataset.seeders)
+        self.assertEqual([a.budget for a in parsed], [a.budget for a in cached])
+        self.assertEqual([a.spreads.tolist() for a in parsed], [a.spreads.tolist() for a in cached])
+
+
+    def testCacheRebuiltOnChange(self):
+        # arrange
+        loadData(self.path, "spread.csv", "advertisers.csv", False)
+        self.writeFile("advertisers.csv", "1,100\n2,250\n")
+        # act
+        advertisers_list = loadData(self.path, "spread.csv", "advertisers.csv", False)
+        # assert
+        self.assertEqual([100, 250], [advertiser.budget for advertiser in advertisers_list])
+
+
+class CreateSyntheticTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name + os.sep
+
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+    def testBinaryMatchesCsv(self):
+        for family in ["random", "diverse", "inverted", "combined"]:
+            # act
+            createSynthetic(self.path, "spread.csv", "advertisers.csv", 30, 40, family, 0, 2000, 0.3, "random", 0, 1, "proportional", 1999, 0, 1, True, True)
+            cached = readCache(getCacheDirectory(self.path, "spread.csv", "advertisers.csv", True), getCacheKey(self.path, "spread.csv", "advertisers.csv", True))
+            parsed = loadData(self.path, "spread.csv", "advertisers.csv", True, False)[0].dataset
+            # assert
+            self.assertIsNotNone(cached)
+            self.assertEqual(parsed.seeders, cached.seeders)
+            self.assertEqual(parsed.budgets, cached.budgets)
+            self.assertEqual(parsed.values_per_engagement, cached.values_per_engagement)
+            self.assertEqual(parsed.spreads.tolist(), cached.spreads.tolist())
+
+
+class GraphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "edgesWithTIC.csv")
+        self.writeEdges([["a", "b", "[0.25, 0.5]"], ["c", "a", "[1.0, 0.0]"], ["a", "c", "[0.125, 0.75]"]])
+
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+    def writeEdges(self, edges):
+        with open(self.filename, 'w', newline='') as edges_file:
+            edges_writer = csv.writer(edges_file)
+            edges_writer.writerow(["node1", "node2", "probabilities"])
+            edges_writer.writerows(edges)
+
+
+    def testBinaryMatchesCsv(self):
+        # arrange
+        parsed = loadGraph(self.filename, False)
+        loadGraph(self.filename)
+        # act
+        opened = loadGraph(self.filename)
+        # assert
+        self.assertIsInstance(opened.indptr, np.memmap)
+        for name in ["indptr", "indices", "topic_probabilities", "node_ids"]:
+            self.assertEqual(getattr(parsed, name).tolist(), getattr(opened, name).tolist())
+        self.assertEqual({"a": 0, "b": 1, "c": 2}, opened.node_index)
+        self.assertEqual(np.float32, opened.topic_probabilities.dtype)
+        self.assertEqual(opened.indices.tolist(), loadGraph(getGraphDirectory(self.filename)).indices.tolist())
+
+
+    def testBinaryRebuiltOnChange(self):
+        # arrange
+        loadGraph(self.filename)
+        self.writeEdges([["a", "b", "[0.25, 0.5]"], ["b", "d", "[0.5, 0.5]"]])
+        # act
+        graph = loadGraph(self.filename)
+        # assert
+        self.assertEqual(["a", "b", "d"], graph.node_ids.tolist())
+        self.assertEqual([0, 1, 2, 2], graph.indptr.tolist())
+
+
+    def testEmptyEdgeFile(self):
+        # arrange
+        self.writeEdges([])
+        # act
+        parsed = loadGraph(self.filename, False)
+        opened = loadGraph(self.filename)
+        # assert
+        for graph in [parsed, opened]:
+            self.assertEqual([], graph.node_ids.tolist())
+            self.assertEqual([0], graph.indptr.tolist())
+            self.assertEqual((0, 0), graph.topic_probabilities.shape)
+
+
+class CreateTICTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name + os.sep
+        with open(self.path + "distribution.csv", 'w', newline='') as distribution_file:
+            distribution_file.write("upper bound,cumulative probability\n0.1,0.5\n0.5,0.9\n")
+        with open(self.path + "edges.csv", 'w', newline='') as edges_file:
+            edges_file.write("".join("%d,%d\n" % (node, (node * 7 + 3) % 50) for node in range(200)))
+
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+    def testBinaryMatchesCsv(self):
+        # arrange
+        createTIC(self.path, "edges.csv", "edgesWithTIC.csv", "distribution.csv", 3, 0, 64)
+        # act
+        parsed = loadGraph(self.path + "edgesWithTIC.csv", False)
+        opened = loadGraph(self.path + "edgesWithTIC.csv")
+        # assert
+        self.assertIsInstance(opened.indptr, np.memmap)
+        for name in ["indptr", "indices", "topic_probabilities", "node_ids"]:
+            self.assertEqual(getattr(parsed, name).tolist(), getattr(opened, name).tolist())
+        self.assertEqual((200, 3), opened.topic_probabilities.shape)
+
+
+    def testProbabilities(self):
+        # arrange
+        createTIC(self.path, "edges.csv", "edgesWithTIC.csv", "distribution.csv", 3, 0, 64, True, False)
+        # act
+        probabilities = np.asarray(loadGraph(self.path + "edgesWithTIC.csv", False).topic_probabilities)
+        # assert
+        self.assertTrue(((probabilities >= 0) & (probabilities <= np.float32(0.5))).all())
+        self.assertTrue((probabilities == 0).any())
+        self.assertTrue((probabilities > 0.1).any())
+
+
+    def testChunkSizeAndSeed(self):
+        # arrange
+        createTIC(self.path, "edges.csv", "a.csv", "distribution.csv", 3, 0, 64, True, False)
+        createTIC(self.path, "edges.csv", "b.csv", "distribution.csv", 3, 0, 1000, True, False)
+        createTIC(self.path, "edges.csv", "c.csv", "distribution.csv", 3, 1, 64, True, False)
+        # act
+        with open(self.path + "a.csv") as a_file, open(self.path + "b.csv") as b_file, open(self.path + "c.csv") as c_file:
+            a, b, c = a_file.read(), b_file.read(), c_file.read()
+        # assert
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+
+
+class SelectSeedersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "edgesWithTIC.csv")
+        with open(self.filename, 'w', newline='') as edges_file:
+            edges_writer = csv.writer(edges_file)
+            edges_writer.writerow(["node1", "node2", "probabilities"])
+            edges_writer.writerows([["a", "b", "[0.5]"], ["c", "d", "[0.5]"], ["c", "a", "[0.5]"], ["b", "a", "[0.5]"], ["e", "a", "[0.5]"], ["c", "e", "[0.5]"], ["b", "d", "[0.5]"]])
+
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+    def testTopNodes(self):
+        # arrange
+        graph = loadGraph(self.filename)
+        # act
+        top_nodes = getTopNodes(np.diff(graph.indptr), 3)
+        all_nodes = getTopNodes(np.diff(graph.indptr), 10)
+        # assert
+        self.assertEqual(["c", "b", "a"], [graph.node_ids[node] for node in top_nodes])
+        self.assertEqual(["c", "b", "a", "e"], [graph.node_ids[node] for node in all_nodes])
+
+
+    def testRandomSeedersWithoutReplacement(self):
+        # arrange
+        graph = loadGraph(self.filename)
+        random_state = random.Random(0)
+        counts = {}
+        # act
+        for _ in range(2000):
+            seeders = getRandomNodes(np.diff(graph.indptr), 2, random_state)
+            self.assertEqual(2, len(set(seeders)))
+            for seeder in seeders:
+                counts[graph.node_ids[seeder]] = counts.get(graph.node_ids[seeder], 0) + 1
+        # assert
+        self.assertEqual({"a", "b", "c", "e"}, set(counts))
+        for count in counts.values():
+            self.assertAlmostEqual(1000, count, delta=150)
+
+
+class SimulateInfluenceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "edgesWithTIC.csv")
+        with open(self.filename, 'w', newline='') as edges_file:
+            edges_writer = csv.writer(edges_file)
+            edges_writer.writerow(["node1", "node2", "probabilities"])
+            edges_writer.writerow(["a", "b", "[0.0, 0.0]"])
+            edges_writer.writerow(["c", "d", "[1.0, 1.0]"])
+            edges_writer.writerow(["a", "c", "[1.0, 0.0]"])
+            edges_writer.writerow(["c", "b", "[1.0, 1.0]"])
+            edges_writer.writerow(["d", "e", "[0.0, 1.0]"])
+
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+    def testLoadGraph(self):
+        # act
+        graph = loadGraph(self.filename)
+        # assert
+        self.assertEqual(["a", "b", "c", "d", "e"], graph.node_ids.tolist())
+        self.assertEqual([0, 2, 2, 4, 5, 5], graph.indptr.tolist())
+        self.assertEqual(["b", "c", "d", "b", "e"], [graph.node_ids[node] for node in graph.indices])
+        self.assertEqual([0.0, 0.5, 1.0, 1.0, 0.5], graph.edgeProbabilities([0.5, 0.5]).tolist())
+
+
+    def testFirstEdgeOnly(self):
+        # arrange
+        graph = loadGraph(self.filename)
+        # act
+        count = getInfluence(graph, graph.edgeProbabilities([1.0, 0.0]), graph.node_index["a"], np.random.RandomState(0))
+        # assert: b is tried from a and never again from c
+        self.assertEqual(2, count)
+
+
+    def testSimulateInfluence(self):
+        # arrange
+        graph = loadGraph(self.filename)
+        edge_probabilities = graph.edgeProbabilities([0.0, 1.0])
+        # act
+        influence = simulateInfluence(graph, edge_probabilities, graph.node_index["c"], 10, np.random.RandomState(0))
+        unknown = simulateInfluence(graph, edge_probabilities, -1, 10, np.random.RandomState(0))
+        # assert
+        self.assertEqual((3.0, 0.0, 10), influence)
+        self.assertEqual((0.0, 0.0, 0), unknown)
+
+
+    def testSimulateWorlds(self):
+        # arrange
+        graph = loadGraph(self.filename)
+        start_nodes = [graph.node_index["a"], graph.node_index["c"], -1]
+        # act
+        influence, standard_errors, worlds = simulateWorlds(graph, [[1.0, 0.0], [0.0, 1.0], [1.0, 0.0]], start_nodes, 5, 0)
+        # assert: edges of probability 0 or 1 are dead or live in every world
+        self.assertEqual([[3, 2, 0], [0, 3, 0], [3, 2, 0]], influence.tolist())
+        self.assertEqual(0, standard_errors.max())
+        self.assertEqual([5, 5, 0], worlds.tolist())
+
+
+    def testSimulateSeeders(self):
+        # arrange
+        graph = loadGraph(self.filename)
+        start_nodes = [graph.node_index[node] for node in ["a", "b", "c", "d"]] + [-1] + [graph.node_index["c"]] * 70
+        # act
+        influence, _, _ = simulateSeeders(graph, graph.edgeProbabilities([1.0, 0.0]), start_nodes, 5, 0)
+        # assert
+        self.assertEqual([3, 0, 2, 0, 0] + [2] * 70, influence.tolist())
+
+
+    def testSimulateSeedersMatchesWorlds(self):
+        # arrange
+        graph = loadGraph(self.filename)
+        start_nodes = [graph.node_index[node] for node in ["a", "b", "c", "d", "e"]]
+        # act
+        influence = simulateSeeders(graph, graph.edgeProbabilities([0.5, 0.5]), start_nodes, 50, 3)
+        worlds = simulateWorlds(graph, [[0.5, 0.5]], start_nodes, 50, 3)
+        # assert
+        self.assertEqual(worlds[0][0].tolist(), influence[0].tolist())
+        self.assertEqual(worlds[1][0].tolist(), influence[1].tolist())
+        self.assertEqual(worlds[2].tolist(), influence[2].tolist())
+
+
+    def testModesMatchCascades(self):
+        # arrange
+        graph = loadGraph(self.filename)
+        edge_probabilities = graph.edgeProbabilities([0.5, 0.5])
+        start_nodes = [graph.node_index["c"], graph.node_index["a"]]
+        # act
+        cascades = [simulateInfluence(graph, edge_probabilities, start_node, 2000, np.random.RandomState(0))[0] for start_node in start_nodes]
+        worlds = simulateWorlds(graph, [[0.5, 0.5]], start_nodes, 2000, 0)[0][0]
+        seeders = simulateSeeders(graph, edge_probabilities, start_nodes, 2000, 0)[0]
+        # assert: no node is reached twice from c, so all modes estimate 2.5; from a, b is tried once and missed
+        # by the cascades, 0.5 * 2.5 in all, while c still reaches it in the worlds, 0.5 * 3.5
+        self.assertAlmostEqual(2.5, cascades[0], delta=0.1)
+        self.assertAlmostEqual(1.25, cascades[1], delta=0.1)
+        for influence in [worlds, seeders]:
+            self.assertAlmostEqual(2.5, influence[0], delta=0.1)
+            self.assertAlmostEqual(1.75, influence[1], delta=0.1)
+
+
+    def testOutputNameHoldsModel(self):
+        # act
+        names = [getOutputName("Data/", 10, None, "_random", mode) for mode in ["cascades", "worlds", "bitparallel"]]
+        # assert
+        self.assertEqual(["Data/influence_10_iterations_random.csv"] + ["Data/influence_10_iterations_liveedge_random.csv"] * 2, names)
+        self.assertEqual("Data/influence_error=0.1_liveedge_random.csv", getOutputName("Data/", 10, 0.1, "_random", "worlds"))
+
+
+    def testSimulateAllWorldsResumes(self):
+        # arrange
+        graph = loadGraph(self.filename)
+        ads = [[0.5, 0.5], [0.2, 0.8]]
+        output = os.path.join(self.directory.name, "influence.csv")
+        resumed = os.path.join(self.directory.name, "resumed.csv")
+        simulateAll(graph, ["a", "c", "d"], ads, output, 20, 1, 1, 2, "worlds")
+        with open(output) as influence_file:
+            lines = influence_file.readlines()
+        with open(resumed, 'w') as resumed_file:
+            resumed_file.write("".join(lines[:3]))
+        # act
+        simulateAll(graph, ["a", "c", "d"], ads, resumed, 20, 1, 2, 1, "worlds")
+        # assert
+        with open(resumed) as resumed_file:
+            self.assertEqual(sorted(lines), sorted(resumed_file.readlines()))
+
+
+    def testAdaptive(self):
+        # arrange
+        graph = loadGraph(self.filename)
+        edge_probabilities = graph.edgeProbabilities([0.5, 0.5])
+        start_nodes = [graph.node_index[node] for node in ["a", "c", "d"]]
+        # act
+        precise = simulateInfluence(graph, edge_probabilities, start_nodes[1], 10, np.random.RandomState(0), StoppingRule(0.01, 1000))
+        capped = simulateInfluence(graph, edge_probabilities, start_nodes[0], 10, np.random.RandomState(0), StoppingRule(0.01, 55))
+        means, standard_errors, worlds = simulateSeeders(graph, edge_probabilities, start_nodes, 10, 0, StoppingRule(0.05, 100000, 0.95))
+        # assert: c always activates b and d, e with probability 0.5
+        self.assertEqual(55, capped[2])
+        self.assertLessEqual(precise[1], 0.01 * precise[0])
+        self.assertLess(precise[2], 1000)
+        self.assertTrue(np.all(1.96 * standard_errors <= 0.05 * means))
+        self.assertAlmostEqual(2.5, means[1], delta=0.15)
+        self.assertLess(worlds.max(), 100000)
+        self.assertEqual(worlds[1], simulateSeeders(graph, edge_probabilities, start_nodes[1:2], 10, 0, StoppingRule(0.05, 100000, 0.95))[2][0])
+
+
+    def testAdaptiveWithoutIterations(self):
+        # arrange
+        graph = loadGraph(self.filename)
+        # act
+        result = simulateInfluence(graph, graph.edgeProbabilities([0.5, 0.5]), graph.node_index["c"], 10, np.random.RandomState(0), StoppingRule(0.01, 0))
+        # assert
+        self.assertEqual((0.0, 0.0, 0), result)
+
+
+    def testSimulateAllAdaptive(self):
+        # arrange
+        graph = loadGraph(self.filename)
+        output = os.path.join(self.directory.name, "influence.csv")
+        # act
+        simulateAll(graph, ["a", "x"], [[0.5, 0.5]], output, 10, 1, stopping_rule=StoppingRule(0.1, 200))
+        # assert
+        with open(output) as influence_file:
+            rows = list(csv.reader(influence_file))
+        self.assertEqual(["0", "a"], rows[0][:2])
+        self.assertEqual(5, len(rows[0]))
+        self.assertLessEqual(int(rows[0][4]), 200)
+        self.assertEqual(["0", "x", "0.0", "0.0", "0"], rows[1])
+
+
+    def testSimulateAllWorkers(self):
+        # arrange
+        graph = loadGraph(self.filename)
+        ads = [[0.5, 0.5], [0.2, 0.8]]
+        output_one = os.path.join(self.directory.name, "one.csv")
+        output_two = os.path.join(self.directory.name, "two.csv")
+        # act
+        simulateAll(graph, ["a", "c", "x"], ads, output_one, 20, 1)
+        simulateAll(graph, ["a", "c", "x"], ads, output_two, 20, 1, 2, 1)
+        # assert
+        with open(output_one) as file_one, open(output_two) as file_two:
+            rows = list(csv.reader(file_one))
+            self.assertEqual(rows, list(csv.reader(file_two)))
+        self.assertEqual([("0", "a"), ("0", "c"), ("0", "x"), ("1", "a"), ("1", "c"), ("1", "x")], [(row[0], row[1]) for row in rows])
+        self.assertEqual("0.0", rows[2][2])
+
+
+    def testSimulateAllResumes(self):
+        # arrange
+        graph = loadGraph(self.filename)
+        ads = [[0.5, 0.5], [0.2, 0.8]]
+        output = os.path.join(self.directory.name, "influence.csv")
+        resumed = os.path.join(self.directory.name, "resumed.csv")
+        simulateAll(graph, ["a", "c", "d"], ads, output, 20, 1)
+        with open(output) as influence_file:
+            lines = influence_file.readlines()
+        with open(resumed, 'w') as resumed_file:
+            resumed_file.write("".join(lines[:4]) + lines[4][:3])
+        # act
+        simulateAll(graph, ["a", "c", "d"], ads, resumed, 20, 1)
+        # assert
+        with open(resumed) as resumed_file:
+            self.assertEqual(lines, resumed_file.readlines())
+
+
+class GreedySeedersTest(unittest.TestCase):
+
+    class CoverageEstimator(object):
+        # number of elements covered by the sets of the seeders, a submodular spread
+        def __init__(self, sets):
+            self.sets = sets
+            self.evaluations = 0
+
+        def getGain(self, nodes, node):
+            self.evaluations += 1
+            return len(self.sets[node] - set().union(*[self.sets[seeder] for seeder in nodes]))
+
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "edgesWithTIC.csv")
+        with open(self.filename, 'w', newline='') as edges_file:
+            edges_writer = csv.writer(edges_file)
+            edges_writer.writerow(["node1", "node2", "probabilities"])
+            edges_writer.writerows([["a", "f", "[0.0]"], ["c", "d", "[1.0]"], ["a", "c", "[0.0]"], ["c", "b", "[1.0]"], ["d", "e", "[1.0]"]])
+
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+    def testInfluenceOfSet(self):
+        # arrange
+        graph = loadGraph(self.filename)
+        # act
+        count = getInfluence(graph, graph.edgeProbabilities([1.0]), [graph.node_index["a"], graph.node_index["d"]], np.random.RandomState(0))
+        # assert
+        self.assertEqual(1, count)
+
+
+    def testSelectGreedy(self):
+        # arrange
+        graph = loadGraph(self.filename)
+        for method in ["celf", "celf++"]:
+            estimator = SpreadEstimator(graph, graph.edgeProbabilities([1.0]), 3, 0)
+            # act
+            seeders, gains = selectGreedy(estimator, list(range(6)), 2, method)
+            # assert
+            self.assertEqual(["c", "a"], [graph.node_ids[seeder] for seeder in seeders])
+            self.assertEqual([4.0, 1.0], gains)
+            self.assertEqual(5.0, estimator.getSpread(seeders))
+
+
+    def testLazyMatchesPlainGreedy(self):
+        # arrange
+        random_state = random.Random(0)
+        for _ in range(20):
+            sets = [set(random_state.sample(range(40), random_state.randint(1, 10))) for _ in range(20)]
+            plain_seeders = []
+            for _ in range(5):
+                gains = [len(sets[node] - set().union(*[sets[seeder] for seeder in plain_seeders])) if node not in plain_seeders else -1 for node in range(20)]
+                plain_seeders.append(gains.index(max(gains)))
+            for method in ["celf", "celf++"]:
+                # act
+                seeders, _ = selectGreedy(self.CoverageEstimator(sets), list(range(20)), 5, method)
+                # assert
+                self.assertEqual(plain_seeders, seeders)
+
+
+class EstimateSpreadsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "edgesWithTIC.csv")
+        with open(self.filename, 'w', newline='') as edges_file:
+            edges_writer = csv.writer(edges_file)
+            edges_writer.writerow(["node1", "node2", "probabilities"])
+            edges_writer.writerow(["a", "b", "[0.0]"])
+            edges_writer.writerow(["c", "d", "[1.0]"])
+            edges_writer.writerow(["a", "c", "[0.5]"])
+            edges_writer.writerow(["c", "b", "[1.0]"])
+            edges_writer.writerow(["d", "e", "[0.5]"])
+
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+    def testReverseGraph(self):
+        # arrange
+        graph = loadGraph(self.filename)
+        # act
+        indptr, sources, edges = getReverseGraph(graph)
+        # assert
+        self.assertEqual([0, 0, 2, 3, 4, 5], indptr.tolist())
+        self.assertEqual(["a", "c", "a", "c", "d"], [graph.node_ids[node] for node in sources])
+        self.assertEqual(["b", "b", "c", "d", "e"], [graph.node_ids[graph.indices[edge]] for edge in edges])
+
+
+    def testSpreads(self):
+        # arrange
+        graph = loadGraph(self.filename)
+        start_nodes = [graph.node_index[node] for node in ["a", "c", "d", "e"]] + [-1]
+        # act
+        spreads, number_of_sets = estimateSpreads(getReverseGraph(graph), graph.edgeProbabilities([1.0]), start_nodes, 0.05, 0.05, np.random.RandomState(0))
+        # assert
+        self.assertLess(number_of_sets, 10000000)
+        for spread, expected in zip(spreads, [1.75, 2.5, 0.5, 0, 0]):
+            self.assertAlmostEqual(expected, spread, delta=0.15)
+
+
+    def testSpreadsNonNegative(self):
+        # arrange
+        graph = loadGraph(self.filename)
+        start_nodes = [graph.node_index[node] for node in ["a", "b", "c", "d", "e"]]
+        # act
+        spreads = [estimateSpreads(getReverseGraph(graph), graph.edgeProbabilities([1.0]), start_nodes, 0.05, 0.05, np.random.RandomState(seed), 1, 3)[0] for seed in range(10)]
+        # assert
+        self.assertGreaterEqual(np.min(spreads), 0)
+
+
+    def testReachableSets(self):
+        # arrange
+        graph = loadGraph(self.filename)
+        reverse_graph = getReverseGraph(graph)
+        # act
+        nodes = sampleReachableSets(reverse_graph, graph.edgeProbabilities([1.0]), 1000, np.random.RandomState(0))
+        # assert: no node twice in a set, a is in the sets rooted at a, at b, c or d over a live a-c edge, and at e over live a-c and d-e edges
+        counts = np.bincount(nodes, minlength=5)
+        self.assertLessEqual(counts.max(), 1000)
+        self.assertAlmostEqual(1000 * (0.2 + 3 * 0.2 * 0.5 + 0.2 * 0.25), counts[graph.node_index["a"]], delta=60)
+
+
+class ExpandSweepTest(unittest.TestCase):
+
+    def testProduct(self):
+        # arrange
+        sweep = {"iterations": 10,
+                 "inputs": [{"path": "Digg/", "advertisers": "a.csv", "spread": ["s1.csv", "s2.csv"]},
+                            {"path": "Flixster/", "advertisers": "a.csv", "spread": "s3.csv"}],
+                 "modes": [{"countseeder": True}, {"countseeder": True, "extended": True, "weighted": True}],
+                 "seeds": [[1, 2], [3, 4]]}
+        # act
+        runs = expandSweep(sweep)
+        # assert
+        self.assertEqual(12, len(runs))
+        self.assertEqual(["s1.csv"] * 4 + ["s2.csv"] * 4 + ["s3.csv"] * 4, [run["spread"] for run in runs])
+        self.assertEqual([False, False, True, True] * 3, [run["extended"] for run in runs])
+        self.assertEqual([1, 3] * 6, [run["groupseed"] for run in runs])
+        self.assertEqual([2, 4] * 6, [run["randomallocationseed"] for run in runs])
+        self.assertTrue(all(run["iterations"] == 10 and run["backend"] == "gurobi" for run in runs))
+
+
+class RunSweepTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name + os.sep
+        createSynthetic(self.path, "spread.csv", "advertisers.csv", 10, 5, "random", 0, 2000, 1.0, "random", 0, 1, "constant", 5000, 0, 0, False, False)
+
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+    def testWorkersShutDownOnError(self):
+        # arrange: the output directory does not exist, so writing the rows of the first run fails
+        sweep = {"path": self.path, "spread": "spread.csv", "advertisers": "advertisers.csv", "output": os.path.join(self.path, "missing", "results.csv"),
+                 "seeds": [[1, 2], [3, 4], [5, 6]]}
+        # act
+        with self.assertRaises(OSError):
+            runSweep(sweep, 2)
+        # assert
+        self.assertEqual([], multiprocessing.active_children())
+
+
+    def testInputsLoadedOnce(self):
+        # arrange: two inputs, each run in two modes with two seeds
+        with open(self.path + "spread.csv") as spread_file, open(self.path + "spread2.csv", 'w') as copy_file:
+            copy_file.write(spread_file.read())
+        sweep = {"path": self.path, "advertisers": "advertisers.csv", "output": os.path.join(self.path, "results.csv"),
+                 "inputs": [{"spread": ["spread.csv", "spread2.csv"]}], "modes": [{}, {"weighted": True}], "seeds": [[1, 2], [3, 4]]}
+        # act
+        with unittest.mock.patch("auction.grid.loadData", wraps=loadData) as load:
+            runSweep(sweep, 2)
+        # assert
+        self.assertEqual(2, load.call_count)
+        with open(sweep["output"]) as output_file:
+            self.assertEqual(8, len(list(csv.reader(output_file))) - 1)
+
+
+    def testRowsInRunOrder(self):
+        # arrange: the first run finishes last, every run logs when it finishes
+        finished = os.path.join(self.path, "finished.txt")
+        sweep = {"path": self.path, "spread": "spread.csv", "advertisers": "advertisers.csv", "output": os.path.join(self.path, "results.csv"),
+                 "modes": [{"iterations": 1, "delay": 1.0}, {"iterations": 2, "delay": 0}, {"iterations": 3, "delay": 0}], "seeds": [[1, 2]]}
+
+        def getDelayedRunRows(inputs, run):
+            time.sleep(run["delay"])
+            with open(finished, 'a') as finished_file:
+                finished_file.write("%d\n" % run["iterations"])
+            return getRunRows(inputs, run)
+
+        # act
+        with unittest.mock.patch("auction.grid.getRunRows", getDelayedRunRows):
+            runSweep(sweep, 3)
+        # assert: one row per iteration, holding the iterations of its run, in the order of the runs
+        with open(finished) as finished_file:
+            self.assertNotEqual(["1", "2", "3"], finished_file.read().split())
+        with open(sweep["output"]) as output_file:
+            rows = list(csv.reader(output_file))[1:]
+        self.assertEqual(["1", "2", "2", "3", "3", "3"], [row[1] for row in rows])
+
+
+class CompareToBaselineTest(unittest.TestCase):
+
+    def testRegressions(self):
+        # arrange
+        baseline = {"cases": {"slower": {"p50": 0.01, "peak_memory": 1000}, "noise": {"p50": 0.00001, "peak_memory": 1000},
+                              "larger": {"p50": 0.01, "peak_memory": 1000}}}
+        results = {"cases": {"slower": {"p50": 0.02, "peak_memory": 1000}, "noise": {"p50": 0.00003, "peak_memory": 1000},
+                             "larger": {"p50": 0.01, "peak_memory": 2000}, "new": {"p50": 1, "peak_memory": 1}}}
+        # act
+        regressions = compareToBaseline(results, baseline, 0.5, 0.25)
+        # assert
+        self.assertEqual(2, len(regressions))
+        self.assertTrue(regressions[0].startswith("slower: median latency"))
+        self.assertTrue(regressions[1].startswith("larger: peak memory"))
+
+
+    def testPeakRss(self):
+        # arrange
+        baseline = {"peak_rss": 1000, "cases": {"case": {"p50": 0.01, "peak_memory": 1000}}}
+        results = {"peak_rss": 1500, "cases": {"case": {"p50": 0.01, "peak_memory": 1000}}}
+        filtered = {"peak_rss": 1500, "cases": {}}
+        # act
+        regressions = compareToBaseline(results, baseline, 0.5, 0.25)
+        filtered_regressions = compareToBaseline(filtered, baseline, 0.5, 0.25)
+        # assert
+        self.assertEqual(["peak RSS 1500 bytes, baseline 1000 bytes"], regressions)
+        self.assertEqual([], filtered_regressions)
+
+
+class DatasetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dataset = Dataset([1, 2], [100, 200], [[10, 20, 30], [40, 50, 60]], ['s1', 's2', 's3'])
+        self.advertisers = self.dataset.advertisers()
+
+
+    def testRowsAreViews(self):
+        # act
+        self.dataset.spreads[1, 2] = 70
+        # assert
+        self.assertEqual(70, self.advertisers[1].spread('s3'))
+
+
+    def testColumn(self):
+        # act
+        column = self.dataset.column('s2')
+        # assert
+        self.assertEqual([20, 50], column.tolist())
+
+
+    def testDuplicateSharesSpreads(self):
+        # act
+        duplicate = self.advertisers[0].duplicate()
+        # assert
+        self.assertIs(self.dataset, duplicate.dataset)
+        self.assertIs(self.advertisers[0].spreads, duplicate.spreads)
+        self.assertEqual(60, duplicate.value())
+
+
+    def testCachedAggregates(self):
+        # assert
+        self.assertEqual([60, 150], [advertiser.totalSpread() for advertiser in self.advertisers])
+        self.assertEqual([60, 300], [advertiser.value() for advertiser in self.advertisers])
+
+
+    def testSortedOrderFollowsListOnTies(self):
+        # arrange
+        dataset = Dataset([1, 2, 1, 1], [100, 100, 100, 100], [[10], [10], [10], [20]], ['s1'])
+        advertisers = dataset.advertisers()
+        # act
+        by_value = sortAdvertisers([advertisers[2], advertisers[0], advertisers[3], advertisers[1]], True)
+        by_value_per_engagement = sortAdvertisers([advertisers[2], advertisers[0], advertisers[3], advertisers[1]], False)
+        # assert
+        self.assertEqual([3, 1, 2, 0], [advertiser.index for advertiser in by_value])
+        self.assertEqual([1, 2, 0, 3], [advertiser.index for advertiser in by_value_per_engagement])
+
+
+    def testSpreadMatrixAlignsSeeders(self):
+        # arrange
+        advertiser = Advertiser(1, 100, {'s3': 3, 's1': 1, 's2': 2})
+        # act
+        spreads, seeders = getSpreadMatrix([self.advertisers[0], advertiser])
+        # assert
+        self.assertEqual(['s1', 's2', 's3'], seeders)
+        self.assertEqual([[10, 20, 30], [1, 2, 3]], spreads.tolist())
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
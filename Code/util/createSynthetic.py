@@ -0,0 +1,217 @@
+#%%
+import os.path
+import numpy as np
+from argparse import ArgumentParser
+from auction.auction import CACHE_ARRAYS
+from auction.auction import getCacheKey
+from auction.auction import getCacheDirectory
+from storage.cache import openCache
+from storage.cache import commitCache
+
+# Spread families, modelled on the files in Synthetic/
+FAMILIES = ["constant", "random", "squared", "diverse", "inverted", "ad_dependent", "combined"]
+VALUES = ["random", "increasing", "constant"]
+BUDGETS = ["constant", "proportional", "random"]
+
+# Independent random streams of the generator, each advertiser row has its own spread and sparsity stream
+VALUE_STREAM = 0
+SPREAD_STREAM = 1
+SPARSITY_STREAM = 2
+TOPIC_STREAM = 3
+
+# Topics of the diverse family, as in createAdvertisers.py
+NUMBER_OF_TOPICS = 20
+
+
+#%%
+def getRandomState(seed, *stream):
+    return np.random.RandomState(np.random.MT19937(np.random.SeedSequence(seed, spawn_key=stream)))
+
+
+def getSpreads(family, advertiser, number_of_advertisers, number_of_seeders, low, high, seed, seeder_topics):
+    """Return the spreads of one advertiser over all seeders.
+
+    constant: high everywhere
+    random: uniform in [low, high)
+    squared: high times the product of two uniforms in [0, 1)
+    diverse: high times the advertiser's topic distribution (random topics, randomly dampened) applied to
+             the seeder's uniform topic weights
+    inverted: 1000 * (n - k) / (k + 1) for the k-th advertiser, to be combined with increasing values
+    ad_dependent: one uniform in [low, high) per advertiser
+    combined: mean of ad_dependent and random
+    """
+    random_state = getRandomState(seed, SPREAD_STREAM, advertiser)
+    if family == "constant":
+        return np.full(number_of_seeders, float(high))
+    if family == "random":
+        return random_state.uniform(low, high, number_of_seeders)
+    if family == "squared":
+        return high * random_state.random_sample(number_of_seeders) * random_state.random_sample(number_of_seeders)
+    if family == "diverse":
+        topic_distribution = random_state.random_sample(NUMBER_OF_TOPICS)
+        topic_distribution *= random_state.random_sample() / topic_distribution.sum()
+        return high * (seeder_topics @ topic_distribution)
+    if family == "inverted":
+        return np.full(number_of_seeders, 1000.0 * (number_of_advertisers - advertiser) / (advertiser + 1))
+    if family == "ad_dependent":
+        return np.full(number_of_seeders, random_state.uniform(low, high))
+    if family == "combined":
+        return (random_state.uniform(low, high) + random_state.uniform(low, high, number_of_seeders)) / 2
+    raise ValueError("unknown spread family " + family)
+
+
+def getSeeders(advertiser, number_of_seeders, density, seed):
+    """Return the seeders the advertiser has a spread for, at least one."""
+    if density >= 1:
+        return np.arange(number_of_seeders)
+    seeders = np.flatnonzero(getRandomState(seed, SPARSITY_STREAM, advertiser).random_sample(number_of_seeders) < density)
+    if len(seeders) == 0:
+        seeders = np.array([getRandomState(seed, SPARSITY_STREAM, advertiser).randint(number_of_seeders)])
+    return seeders
+
+
+def formatValues(values):
+    # ten significant digits like the bundled files; the values are parsed back, so the binary layout holds exactly what loadData reads from the CSV
+    strings = np.char.mod('%.10g', values)
+    return strings, strings.astype(np.float64)
+
+
+def getValuesAndBudgets(number_of_advertisers, value_distribution, value_low, value_high, budget_distribution, budget, budget_low, seed):
+    random_state = getRandomState(seed, VALUE_STREAM)
+    if value_distribution == "random":
+        values_per_engagement = random_state.uniform(value_low, value_high, number_of_advertisers)
+    elif value_distribution == "increasing":
+        values_per_engagement = np.arange(1, number_of_advertisers + 1) / number_of_advertisers
+    elif value_distribution == "constant":
+        values_per_engagement = np.full(number_of_advertisers, float(value_high))
+    else:
+        raise ValueError("unknown value distribution " + value_distribution)
+
+    if budget_distribution == "constant":
+        budgets = np.full(number_of_advertisers, float(budget))
+    elif budget_distribution == "proportional":
+        budgets = budget * values_per_engagement
+    elif budget_distribution == "random":
+        budgets = random_state.uniform(budget_low, budget, number_of_advertisers)
+    else:
+        raise ValueError("unknown budget distribution " + budget_distribution)
+
+    return values_per_engagement, budgets
+
+
+def createSynthetic(path, spread_filename, advertisers_filename, number_of_advertisers, number_of_seeders, family, low, high, density,
+                    value_distribution, value_low, value_high, budget_distribution, budget, budget_low, seed, count_seeder, binary):
+    """Write a synthetic instance as CSV files and, if binary, as the cache loadData reads.
+
+    The instance is generated and written one advertiser at a time, so memory stays bounded by the
+    number of seeders, not the size of the spread matrix.
+    """
+    seeder_topics = None
+    if family == "diverse":
+        seeder_topics = getRandomState(seed, TOPIC_STREAM).random_sample((number_of_seeders, NUMBER_OF_TOPICS))
+
+    # values and budgets
+    values_per_engagement, budgets = getValuesAndBudgets(number_of_advertisers, value_distribution, value_low, value_high, budget_distribution, budget, budget_low, seed)
+    value_strings, values_per_engagement = formatValues(values_per_engagement)
+    budget_strings, budgets = formatValues(budgets)
+    with open(path + advertisers_filename, 'w', newline='') as advertisers_file:
+        for value_string, budget_string in zip(value_strings.tolist(), budget_strings.tolist()):
+            advertisers_file.write(value_string + "," + budget_string + "\n")
+
+    # loadData numbers the seeders in order of their first appearance in the spread file
+    seeder_column = np.full(number_of_seeders, -1)
+    seeders = []
+    for advertiser in range(number_of_advertisers):
+        advertiser_seeders = getSeeders(advertiser, number_of_seeders, density, seed)
+        new_seeders = advertiser_seeders[seeder_column[advertiser_seeders] < 0]
+        seeder_column[new_seeders] = np.arange(len(seeders), len(seeders) + len(new_seeders))
+        seeders.extend(new_seeders.tolist())
+        if len(seeders) == number_of_seeders:
+            break
+
+    # the spread matrix of the binary layout is a .npy file written row by row after its header
+    matrix_file = None
+    if binary:
+        cache_directory = getCacheDirectory(path, spread_filename, advertisers_filename, count_seeder)
+        openCache(cache_directory)
+        matrix_file = open(os.path.join(cache_directory, "spreads.npy"), 'wb')
+        np.lib.format.write_array_header_2_0(matrix_file, {"descr": np.lib.format.dtype_to_descr(np.dtype(np.float64)), "fortran_order": False, "shape": (number_of_advertisers, len(seeders))})
+
+    # spreads, one advertiser at a time
+    with open(path + spread_filename, 'w', newline='') as spread_file:
+        for advertiser in range(number_of_advertisers):
+            advertiser_seeders = getSeeders(advertiser, number_of_seeders, density, seed)
+            spread_strings, advertiser_spreads = formatValues(getSpreads(family, advertiser, number_of_advertisers, number_of_seeders, low, high, seed, seeder_topics)[advertiser_seeders])
+            prefix = str(advertiser) + ","
+            spread_file.write("".join([prefix + str(seeder) + "," + spread_string + "\n" for seeder, spread_string in zip(advertiser_seeders.tolist(), spread_strings.tolist())]))
+            if matrix_file is not None:
+                if count_seeder:
+                    advertiser_spreads += 1
+                row = np.zeros(len(seeders))
+                row[seeder_column[advertiser_seeders]] = advertiser_spreads
+                matrix_file.write(row.tobytes())
+
+    if binary:
+        matrix_file.close()
+        arrays = {"values_per_engagement": values_per_engagement, "budgets": budgets, "seeders": np.array(seeders, dtype=np.int64)}
+        for name in CACHE_ARRAYS:
+            if name in arrays:
+                np.save(os.path.join(cache_directory, name + ".npy"), arrays[name])
+        # keyed by the CSV files just written, so loadData picks the binary layout up directly
+        commitCache(cache_directory, getCacheKey(path, spread_filename, advertisers_filename, count_seeder))
+
+
+#%%
+if __name__ == '__main__':
+
+    # Set defaults
+    path = "Data/Synthetic/"
+    number_of_advertisers = 10000
+    number_of_seeders = 500
+    family = "random"
+    low = 0
+    high = 2000
+    density = 1.0
+    value_distribution = "random"
+    value_low = 0
+    value_high = 1
+    budget_distribution = "constant"
+    budget = 5000
+    budget_low = 0
+    seed = 0
+
+    # Parse command line arguments
+    parser = ArgumentParser()
+    parser.add_argument("-p", "--path", default=path)
+    parser.add_argument("-n", "--advertisers", default=number_of_advertisers, type=int)
+    parser.add_argument("-m", "--seeders", default=number_of_seeders, type=int)
+    parser.add_argument("-f", "--family", default=family, choices=FAMILIES)
+    parser.add_argument("-l", "--low", default=low, type=float)
+    parser.add_argument("-u", "--high", default=high, type=float)
+    parser.add_argument("-d", "--density", default=density, type=float)
+    parser.add_argument("-v", "--values", default=value_distribution, choices=VALUES)
+    parser.add_argument("--valuelow", default=value_low, type=float)
+    parser.add_argument("--valuehigh", default=value_high, type=float)
+    parser.add_argument("-b", "--budget", default=budget, type=float)
+    parser.add_argument("--budgets", default=budget_distribution, choices=BUDGETS)
+    parser.add_argument("--budgetlow", default=budget_low, type=float)
+    parser.add_argument("-r", "--seed", default=seed, type=int)
+    parser.add_argument("-s", "--spread", default=None)
+    parser.add_argument("-a", "--advertisersfile", default=None)
+    parser.add_argument("-c", "--countseeder", action="store_true")
+    parser.add_argument("--nobinary", action="store_true")
+
+    args = parser.parse_args()
+
+    # file names follow the bundled ones
+    spread_filename = args.spread
+    if spread_filename is None:
+        spread_filename = "influence=%s_n=%d_m=%d_d=%g_seed=%d.csv" % (args.family, args.advertisers, args.seeders, args.density, args.seed)
+    advertisers_filename = args.advertisersfile
+    if advertisers_filename is None:
+        advertisers_filename = "value=%s_b=%s_%g_n=%d_seed=%d.csv" % (args.values, args.budgets, args.budget, args.advertisers, args.seed)
+
+    createSynthetic(args.path, spread_filename, advertisers_filename, args.advertisers, args.seeders, args.family, args.low, args.high, args.density,
+                    args.values, args.valuelow, args.valuehigh, args.budgets, args.budget, args.budgetlow, args.seed, args.countseeder, not args.nobinary)
+
+    print("Wrote %s and %s to %s" % (spread_filename, advertisers_filename, args.path))
@@ -1,55 +1,123 @@
 #%%
 import csv
-import random
+import itertools
+import numpy as np
+from argparse import ArgumentParser
+from util.graph import GraphWriter
+from util.graph import getGraphDirectory
+from storage.cache import getFileKey
 
-#%%
-# parameters
-number_of_topics = 10
-path = 'Data/Flixster/'
+# Independent random streams of the generator, so the probabilities do not depend on the chunk size
+BUCKET_STREAM = 0
+POSITION_STREAM = 1
 
-#%%
-#Get probability distribtion
-distribution_list = []
-with open(path + 'distribution.csv', 'r') as dist_file:
-    dist_reader = csv.reader(dist_file, delimiter=',')
-    next(dist_reader, None)  # skip the headers
-    for row in dist_reader:
-        if len(row) > 1:
-            distribution_list.append([row[0], row[1]])
 
 #%%
-with open(path + 'edges.csv', 'r') as edges_file:
-    with open(path + 'edgesWithTIC.csv', 'w', newline='') as tic_file:
-        edges_reader = csv.reader(edges_file, delimiter=',')
-        tic_writer = csv.writer(tic_file, delimiter=',')
+def getRandomState(seed, *stream):
+    return np.random.RandomState(np.random.MT19937(np.random.SeedSequence(seed, spawn_key=stream)))
 
-        #header
-        tic_writer.writerow(["node 1", "node 2", "topic probabilities"])
 
-        for row in edges_reader:
+def readDistribution(filename):
+    """Return the upper bounds and cumulative probabilities of the buckets of a distribution file."""
+    upper_bounds = []
+    cumulative_probabilities = []
+    with open(filename, 'r') as dist_file:
+        dist_reader = csv.reader(dist_file, delimiter=',')
+        next(dist_reader, None)  # skip the headers
+        for row in dist_reader:
             if len(row) > 1:
+                upper_bounds.append(float(row[0]))
+                cumulative_probabilities.append(float(row[1]))
+    return np.array(upper_bounds), np.array(cumulative_probabilities)
+
+
+def sampleProbabilities(distribution, number_of_edges, number_of_topics, bucket_state, position_state):
+    """Return a number_of_edges x number_of_topics array of probabilities drawn from distribution.
+
+    Each probability lies in the first bucket whose cumulative probability reaches a uniform draw,
+    uniformly between the upper bound of the bucket before, or 0, and its own upper bound. Draws above
+    the last cumulative probability give 0.
+    """
+    upper_bounds, cumulative_probabilities = distribution
+    buckets = np.searchsorted(cumulative_probabilities, bucket_state.random_sample((number_of_edges, number_of_topics)), side='left')
+    in_distribution = buckets < len(upper_bounds)
+    buckets[~in_distribution] = 0
+
+    lower_bounds = np.concatenate(([0.0], upper_bounds))[buckets]
+    probabilities = lower_bounds + position_state.random_sample((number_of_edges, number_of_topics)) * (upper_bounds[buckets] - lower_bounds)
+    probabilities[~in_distribution] = 0
+    return probabilities
+
 
-                probabilities = []
+def createTIC(path, edges_filename, tic_filename, distribution_filename, number_of_topics, seed, chunk_size, csv_output=True, binary=True):
+    """Write the edges of an edge file with random topic probabilities, as CSV and, if binary, as the graph loadGraph reads.
 
-                for _ in range(number_of_topics):
+    The edges are read, sampled and written chunk_size at a time, so memory stays bounded by the chunk
+    size and, for the binary graph, the nodes and edge endpoints.
+    """
+    distribution = readDistribution(path + distribution_filename)
+    bucket_state = getRandomState(seed, BUCKET_STREAM)
+    position_state = getRandomState(seed, POSITION_STREAM)
 
-                    #Get probability from distribution
-                    probability = 0
-                    random_number = random.random()
-                    index = 0
-                    while float(distribution_list[index][1]) < random_number:
-                        index += 1
-                    if index < len(distribution_list):
-                        lower_bound = 0
-                        if index > 0:
-                            lower_bound = float(distribution_list[index-1][0])
-                        upper_bound = float(distribution_list[index][0])
-                        probability = lower_bound + random.random() * (upper_bound - lower_bound)
+    tic_file = None
+    tic_writer = None
+    if csv_output:
+        tic_file = open(path + tic_filename, 'w', newline='')
+        tic_writer = csv.writer(tic_file, delimiter=',')
+        tic_writer.writerow(["node 1", "node 2", "topic probabilities"])
+
+    graph_writer = None
+    if binary:
+        graph_writer = GraphWriter(getGraphDirectory(path + tic_filename), number_of_topics)
 
-                    probabilities += [probability]
+    with open(path + edges_filename, 'r') as edges_file:
+        edges_reader = (row for row in csv.reader(edges_file, delimiter=',') if len(row) > 1)
+        while True:
+            rows = list(itertools.islice(edges_reader, chunk_size))
+            if not rows:
+                break
+            probabilities = sampleProbabilities(distribution, len(rows), number_of_topics, bucket_state, position_state)
+            if tic_writer is not None:
+                tic_writer.writerows(row + [topic_probabilities] for row, topic_probabilities in zip(rows, probabilities.tolist()))
+            if graph_writer is not None:
+                graph_writer.addEdges([row[0] for row in rows], [row[1] for row in rows], probabilities)
 
-                tic_writer.writerow(row + [probabilities])
+    if tic_file is not None:
+        tic_file.close()
+    if graph_writer is not None:
+        # keyed by the CSV file just written, so loadGraph picks the binary graph up directly
+        graph_writer.close(getFileKey(path + (tic_filename if csv_output else edges_filename)))
 
 
 #%%
-print(distribution_list)
\ No newline at end of file
+if __name__ == '__main__':
+
+    # Set defaults
+    path = 'Data/Flixster/'
+    edges_filename = 'edges.csv'
+    tic_filename = 'edgesWithTIC.csv'
+    distribution_filename = 'distribution.csv'
+    number_of_topics = 10
+    seed = 0
+    chunk_size = 100000
+
+    # Parse command line arguments
+    parser = ArgumentParser()
+    parser.add_argument("-p", "--path", default=path)
+    parser.add_argument("-e", "--edges", default=edges_filename)
+    parser.add_argument("-o", "--output", default=tic_filename)
+    parser.add_argument("-d", "--distribution", default=distribution_filename)
+    parser.add_argument("-t", "--topics", default=number_of_topics, type=int)
+    parser.add_argument("-r", "--seed", default=seed, type=int)
+    parser.add_argument("-c", "--chunk", default=chunk_size, type=int)
+    parser.add_argument("--nocsv", action="store_true")
+    parser.add_argument("--nobinary", action="store_true")
+
+    args = parser.parse_args()
+
+    if args.nocsv and args.nobinary:
+        parser.error("--nocsv and --nobinary leave nothing to write")
+
+    createTIC(args.path, args.edges, args.output, args.distribution, args.topics, args.seed, args.chunk, not args.nocsv, not args.nobinary)
+
+    print("Wrote %s to %s" % (args.output, args.path))
@@ -0,0 +1,157 @@
+#%%
+import csv
+import math
+import numpy as np
+from argparse import ArgumentParser
+from util.graph import loadGraph
+from util.simulateInfluence import readSeeders
+from util.simulateInfluence import readAds
+
+
+#%%
+def getReverseGraph(graph):
+    """Return the in-edges of graph in CSR form as (indptr, sources, edges).
+
+    The in-edges of node k are edges[indptr[k]:indptr[k + 1]], the ids of edges of graph, and sources
+    holds their source nodes.
+    """
+    number_of_nodes = len(graph.indptr) - 1
+    edge_sources = np.repeat(np.arange(number_of_nodes), np.diff(graph.indptr))
+    edges = np.argsort(graph.indices, kind='stable')
+    indptr = np.zeros(number_of_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(graph.indices, minlength=number_of_nodes), out=indptr[1:])
+    return indptr, edge_sources[edges], edges
+
+
+def sampleReachableSets(reverse_graph, edge_probabilities, number_of_sets, random_state):
+    """Return the nodes of number_of_sets random reverse-reachable sets, concatenated.
+
+    A reverse-reachable set holds the nodes that reach a uniformly drawn root over edges that are live
+    with their activation probability, every edge drawn independently. All sets of a call are grown
+    together, one level at a time, with every (set, node) pair encoded as set * n + node in a sorted
+    array of the pairs visited so far, so memory and time follow the size of the sets rather than n.
+    """
+    indptr, sources, edges = reverse_graph
+    number_of_nodes = len(indptr) - 1
+
+    frontier_sets = np.arange(number_of_sets, dtype=np.int64)
+    frontier_nodes = random_state.randint(number_of_nodes, size=number_of_sets)
+    visited = frontier_sets * number_of_nodes + frontier_nodes
+    nodes = [frontier_nodes]
+
+    while len(frontier_nodes) > 0:
+        # in-edges of all frontier nodes
+        starts = indptr[frontier_nodes]
+        lengths = indptr[frontier_nodes + 1] - starts
+        offsets = np.cumsum(lengths) - lengths
+        positions = np.arange(lengths.sum()) - np.repeat(offsets - starts, lengths)
+
+        live = random_state.random_sample(len(positions)) < edge_probabilities[edges[positions]]
+        keys = np.repeat(frontier_sets, lengths)[live] * number_of_nodes + sources[positions[live]]
+
+        # drop the nodes already in their set
+        keys = np.unique(keys)
+        positions = np.searchsorted(visited, keys)
+        keys = keys[visited[np.minimum(positions, len(visited) - 1)] != keys]
+        visited = np.insert(visited, np.searchsorted(visited, keys), keys)
+
+        frontier_sets, frontier_nodes = np.divmod(keys, number_of_nodes)
+        nodes.append(frontier_nodes)
+
+    return np.concatenate(nodes)
+
+
+def getThreshold(epsilon, delta):
+    # coverage at which the stopping rule of Dagum et al. guarantees a relative error of epsilon with probability 1 - delta
+    return 1 + 4 * (1 + epsilon) * (math.e - 2) * math.log(2 / delta) / epsilon ** 2
+
+
+def estimateSpreads(reverse_graph, edge_probabilities, start_nodes, epsilon, delta, random_state, batch_size=10000, max_sets=10000000):
+    """Return the estimated spread of every start node, not counting the start node, and the number of sets sampled.
+
+    The spread of a node is n times the fraction of reverse-reachable sets containing it. Sets are sampled in
+    batches until every start node is in at least getThreshold(epsilon, delta / number of start nodes) sets, so
+    all estimates are within a relative error of epsilon with probability 1 - delta, or max_sets are sampled.
+    Start nodes of -1 are not in the graph and have a spread of 0.
+    """
+    number_of_nodes = len(reverse_graph[0]) - 1
+    start_nodes = np.asarray(start_nodes)
+    in_graph = start_nodes >= 0
+    threshold = getThreshold(epsilon, delta / max(1, in_graph.sum()))
+
+    coverage = np.zeros(number_of_nodes, dtype=np.int64)
+    number_of_sets = 0
+    while number_of_sets < max_sets and in_graph.any():
+        sets = min(batch_size, max_sets - number_of_sets)
+        coverage += np.bincount(sampleReachableSets(reverse_graph, edge_probabilities, sets, random_state), minlength=number_of_nodes)
+        number_of_sets += sets
+        if coverage[start_nodes[in_graph]].min() >= threshold:
+            break
+
+    spreads = np.zeros(len(start_nodes))
+    if number_of_sets > 0:
+        # a node in fewer than 1 / n of the sets would get a negative spread
+        spreads[in_graph] = np.maximum(number_of_nodes * coverage[start_nodes[in_graph]] / number_of_sets - 1, 0)
+    return spreads, number_of_sets
+
+
+def getRandomState(seed, advertiser):
+    return np.random.RandomState(np.random.Philox(np.random.SeedSequence(seed, spawn_key=(advertiser,))))
+
+
+#%%
+if __name__ == '__main__':
+
+    # Set defaults
+    path = "Data/Digg/"
+    edges_file = "edgesWithTIC.csv"
+    seeders_file = "random_seeders.csv"
+    advertisers_file = 'advertisers_diverse.csv'
+    output = None
+    epsilon = 0.1
+    delta = 0.05
+    seed = 0
+    batch_size = 10000
+    max_sets = 10000000
+
+    # Parse command line arguments
+    parser = ArgumentParser()
+    parser.add_argument("-p", "--path", default=path)
+    parser.add_argument("-e", "--edges", default=edges_file)
+    parser.add_argument("-s", "--seeders", default=seeders_file)
+    parser.add_argument("-a", "--advertisers", default=advertisers_file)
+    parser.add_argument("-o", "--output", default=output)
+    parser.add_argument("-t", "--epsilon", default=epsilon, type=float)
+    parser.add_argument("-d", "--delta", default=delta, type=float)
+    parser.add_argument("-r", "--seed", default=seed, type=int)
+    parser.add_argument("-b", "--batch", default=batch_size, type=int)
+    parser.add_argument("-m", "--maxsets", default=max_sets, type=int)
+
+    args = parser.parse_args()
+
+    output = args.output
+    if output is None:
+        output = args.path + 'influence_rr_epsilon=%g_delta=%g.csv' % (args.epsilon, args.delta)
+
+    graph = loadGraph(args.path + args.edges)
+    reverse_graph = getReverseGraph(graph)
+    print("Edges loaded.")
+
+    seeders_list = readSeeders(args.path + args.seeders)
+    start_nodes = [graph.node_index.get(seeder, -1) for seeder in seeders_list]
+    print("Nodes loaded.")
+
+    ad_list = readAds(args.path + args.advertisers)
+    print("Ads loaded.")
+
+    with open(output, 'w', newline='') as influence_file:
+        influence_writer = csv.writer(influence_file, delimiter=',')
+
+        for index in range(len(ad_list)):
+            spreads, number_of_sets = estimateSpreads(reverse_graph, graph.edgeProbabilities(ad_list[index]), start_nodes, args.epsilon, args.delta,
+                                                      getRandomState(args.seed, index), args.batch, args.maxsets)
+            influence_writer.writerows([index, seeder, spread] for seeder, spread in zip(seeders_list, spreads.tolist()))
+            influence_file.flush()
+            print("Ad %d: %d reverse-reachable sets" % (index, number_of_sets))
+
+    print("Done.")
@@ -0,0 +1,219 @@
+#%%
+import os
+import csv
+import ast
+import json
+import numpy as np
+from argparse import ArgumentParser
+from storage.cache import getFileKey
+from storage.cache import openCache
+from storage.cache import saveArray
+from storage.cache import commitCache
+
+# Arrays of a binary graph, each stored as one .npy file in the graph directory
+GRAPH_FILES = ("indptr", "indices", "topic_probabilities", "node_ids")
+
+# Edges of topic probabilities GraphWriter puts in CSR order at once
+WRITE_CHUNK = 65536
+
+
+#%%
+class Graph(object):
+    """A directed graph with topic-dependent activation probabilities in CSR form.
+
+    The out-edges of node k are indices[indptr[k]:indptr[k + 1]], in the order of the edge file, and
+    topic_probabilities holds the topic probabilities of every edge in the same order, as float32. The
+    node ids of the edge file are numbered 0..n-1 in order of their first appearance; node_ids maps the
+    numbers back to the ids.
+    """
+    def __init__(self, node_ids, indptr, indices, topic_probabilities):
+        self.node_ids = node_ids
+        self.indptr = indptr
+        self.indices = indices
+        self.topic_probabilities = topic_probabilities
+        self.index = None
+
+    @property
+    def node_index(self):
+        # built on first use, so opening a binary graph does not read its node ids
+        if self.index is None:
+            self.index = {node_id: index for index, node_id in enumerate(np.asarray(self.node_ids).tolist())}
+        return self.index
+
+    def edgeProbabilities(self, topic_distribution):
+        """Return the activation probability of every edge for an ad with the given topic distribution."""
+        return self.topic_probabilities @ np.asarray(topic_distribution, dtype=np.float64)
+
+
+def getIndexType(number_of_nodes):
+    return np.int32 if number_of_nodes < 2 ** 31 else np.int64
+
+
+def buildGraph(node_ids, sources, targets, topic_probabilities):
+    """Return the Graph of the edges sources[i] -> targets[i]."""
+    # group the edges by source, keeping the order of the file within each source
+    order = np.argsort(sources, kind='stable')
+    indptr = np.zeros(len(node_ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=len(node_ids)), out=indptr[1:])
+    indices = targets[order].astype(getIndexType(len(node_ids)))
+    return Graph(np.array(node_ids, dtype=str), indptr, indices, topic_probabilities[order])
+
+
+def parseGraph(filename):
+    node_index = {}
+    sources = []
+    targets = []
+    topic_probabilities = []
+    with open(filename, 'r') as tic_file:
+        tic_reader = csv.reader(tic_file, delimiter=',')
+        next(tic_reader, None)  # skip the headers
+
+        for row in tic_reader:
+            for node in row[:2]:
+                if node not in node_index:
+                    node_index[node] = len(node_index)
+            sources.append(node_index[row[0]])
+            targets.append(node_index[row[1]])
+            topic_probabilities.append(ast.literal_eval(row[2]))
+
+    sources = np.array(sources, dtype=np.int64)
+    targets = np.array(targets, dtype=np.int64)
+    # the topics are counted on the first edge, an edge file without edges has none
+    number_of_topics = len(topic_probabilities[0]) if topic_probabilities else 0
+    topic_probabilities = np.array(topic_probabilities, dtype=np.float32).reshape(len(sources), number_of_topics)
+    return buildGraph(list(node_index.keys()), sources, targets, topic_probabilities)
+
+
+def getGraphDirectory(filename):
+    return os.path.splitext(filename)[0] + ".graph"
+
+
+def writeGraph(directory, graph, key):
+    """Write graph as one .npy file per array to directory, keyed by the edge file it was read from."""
+    openCache(directory)
+    for name in GRAPH_FILES:
+        saveArray(directory, name, getattr(graph, name))
+    commitCache(directory, key)
+
+
+class GraphWriter(object):
+    """Writes a binary graph from chunks of edges, as they are generated or read.
+
+    Only the node ids and the edge endpoints are held in memory. The topic probabilities go to a raw
+    file in the order of the edges and are copied into CSR order WRITE_CHUNK edges at a time on close,
+    so the graph ends up the same as writeGraph writes for the edge file with these edges.
+    """
+    def __init__(self, directory, number_of_topics):
+        openCache(directory)
+        self.directory = directory
+        self.number_of_topics = number_of_topics
+        self.node_index = {}
+        self.sources = []
+        self.targets = []
+        self.probabilities_file = open(os.path.join(directory, "topic_probabilities.raw"), 'wb')
+
+    def addEdges(self, sources, targets, topic_probabilities):
+        """Add the edges sources[i] -> targets[i], given by node id, with one row of topic probabilities each."""
+        node_index = self.node_index
+        source_numbers = []
+        target_numbers = []
+        for source, target in zip(sources, targets):
+            for node in (source, target):
+                if node not in node_index:
+                    node_index[node] = len(node_index)
+            source_numbers.append(node_index[source])
+            target_numbers.append(node_index[target])
+        self.sources.append(np.array(source_numbers, dtype=np.int64))
+        self.targets.append(np.array(target_numbers, dtype=np.int64))
+        self.probabilities_file.write(np.ascontiguousarray(topic_probabilities, dtype=np.float32).tobytes())
+
+    def close(self, key):
+        """Write the graph of all added edges to the directory, keyed by key."""
+        self.probabilities_file.close()
+        raw_filename = os.path.join(self.directory, "topic_probabilities.raw")
+
+        sources = np.concatenate(self.sources + [np.zeros(0, dtype=np.int64)])
+        targets = np.concatenate(self.targets + [np.zeros(0, dtype=np.int64)])
+        self.sources = self.targets = None
+        number_of_nodes = len(self.node_index)
+
+        order = np.argsort(sources, kind='stable')
+        indptr = np.zeros(number_of_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=number_of_nodes), out=indptr[1:])
+        saveArray(self.directory, "indptr", indptr)
+        saveArray(self.directory, "indices", targets[order].astype(getIndexType(number_of_nodes)))
+        saveArray(self.directory, "node_ids", np.array(list(self.node_index.keys()), dtype=str))
+
+        # the probability matrix is a .npy file written chunk by chunk after its header
+        shape = (len(order), self.number_of_topics)
+        with open(os.path.join(self.directory, "topic_probabilities.tmp"), 'wb') as array_file:
+            np.lib.format.write_array_header_2_0(array_file, {"descr": np.lib.format.dtype_to_descr(np.dtype(np.float32)), "fortran_order": False, "shape": shape})
+            if len(order) > 0:
+                raw_probabilities = np.memmap(raw_filename, dtype=np.float32, mode='r', shape=shape)
+                for start in range(0, len(order), WRITE_CHUNK):
+                    array_file.write(raw_probabilities[order[start:start + WRITE_CHUNK]].tobytes())
+                del raw_probabilities
+        os.replace(os.path.join(self.directory, "topic_probabilities.tmp"), os.path.join(self.directory, "topic_probabilities.npy"))
+        os.remove(raw_filename)
+
+        commitCache(self.directory, key)
+
+
+def openGraph(directory, key=None):
+    """Return the memory-mapped graph of directory, or None if it is incomplete or its key differs from key."""
+    try:
+        with open(os.path.join(directory, "key.json")) as key_file:
+            if key is not None and json.load(key_file) != key:
+                return None
+        arrays = {name: np.load(os.path.join(directory, name + ".npy"), mmap_mode='r') for name in GRAPH_FILES}
+    except (OSError, ValueError):
+        return None
+    return Graph(arrays["node_ids"], arrays["indptr"], arrays["indices"], arrays["topic_probabilities"])
+
+
+def loadGraph(filename, binary=True):
+    """Return the graph of an edge file, or of a graph directory written by writeGraph.
+
+    The graph of an edge file is kept in binary form in a directory next to it, named like the file with
+    .graph instead of its extension, and opened from there, memory-mapped, as long as the edge file is
+    unchanged.
+    """
+    if os.path.isdir(filename):
+        graph = openGraph(filename)
+        if graph is None:
+            raise ValueError("no complete graph in " + filename)
+        return graph
+    if not binary:
+        return parseGraph(filename)
+
+    key = getFileKey(filename)
+    directory = getGraphDirectory(filename)
+    graph = openGraph(directory, key)
+    if graph is None:
+        graph = parseGraph(filename)
+        try:
+            writeGraph(directory, graph, key)
+        except OSError:
+            # the directory of the edge file may not be writable, the graph is just not kept then
+            pass
+    return graph
+
+
+#%%
+if __name__ == '__main__':
+
+    # Parse command line arguments
+    parser = ArgumentParser()
+    parser.add_argument("edges")
+    parser.add_argument("-o", "--output", default=None)
+
+    args = parser.parse_args()
+
+    directory = args.output
+    if directory is None:
+        directory = getGraphDirectory(args.edges)
+
+    graph = parseGraph(args.edges)
+    writeGraph(directory, graph, getFileKey(args.edges))
+
+    print("Wrote %d nodes, %d edges and %d topics to %s" % (len(graph.node_ids), len(graph.indices), graph.topic_probabilities.shape[1], directory))
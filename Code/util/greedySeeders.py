@@ -0,0 +1,169 @@
+#%%
+import csv
+import heapq
+import numpy as np
+from argparse import ArgumentParser
+from util.graph import loadGraph
+from util.simulateInfluence import getInfluence
+from util.simulateInfluence import readAds
+
+# Lazy greedy variants: CELF re-evaluates the top candidate of the heap until its gain is up to date, CELF++
+# also keeps each candidate's gain given the best candidate of the round, saving the re-evaluation if that one is picked
+METHODS = ["celf", "celf++"]
+
+
+#%%
+class SpreadEstimator(object):
+    """Estimates the spread of seed sets, seeders counted, from cascades simulated by getInfluence.
+
+    Every seed set is simulated once and its estimate cached. All sets are simulated with the same random
+    stream, so the estimates of sets differing by one seeder share most of their noise and the marginal
+    gains the greedy selection compares are far less noisy than the spreads.
+    """
+    def __init__(self, graph, edge_probabilities, iterations, seed):
+        self.graph = graph
+        self.edge_probabilities = edge_probabilities
+        self.iterations = iterations
+        self.seed = seed
+        self.spreads = {frozenset(): 0.0}
+        self.evaluations = 0
+
+    def getSpread(self, nodes):
+        key = frozenset(nodes)
+        if key not in self.spreads:
+            random_state = np.random.RandomState(np.random.Philox(np.random.SeedSequence(self.seed)))
+            start_nodes = np.array(sorted(key))
+            total = 0
+            for _ in range(self.iterations):
+                total += getInfluence(self.graph, self.edge_probabilities, start_nodes, random_state)
+            self.spreads[key] = len(key) + total * 1.0 / self.iterations
+            self.evaluations += 1
+        return self.spreads[key]
+
+    def getGain(self, nodes, node):
+        """Return the marginal spread of adding node to the seed set nodes."""
+        return self.getSpread(list(nodes) + [node]) - self.getSpread(nodes)
+
+
+def selectGreedy(estimator, candidates, k, method="celf"):
+    """Return k seeders picked greedily from candidates by marginal spread, and their marginal spreads.
+
+    Candidates sit in a heap by their last marginal gain. As gains only shrink when seeders are added,
+    a candidate whose gain is up to date for the current seeders and still tops the heap is the best one,
+    and all others keep their stale gains (CELF). With CELF++, every evaluated candidate also gets its
+    gain given the current seeders plus the best candidate of the round so far, which is its next gain
+    if that candidate is picked. Ties go to the earlier candidate.
+    """
+    seeders = []
+    gains = []
+    gain = {}
+    next_gain = {}
+    previous_best = {}
+    round_evaluated = {}
+    heap = []
+
+    current_best = None
+    for position, node in enumerate(candidates):
+        gain[node] = estimator.getGain(seeders, node)
+        round_evaluated[node] = 0
+        if method == "celf++":
+            previous_best[node] = current_best
+            if current_best is not None:
+                next_gain[node] = estimator.getGain([current_best], node)
+        if current_best is None or gain[node] > gain[current_best]:
+            current_best = node
+        heap.append((-gain[node], position, node))
+    heapq.heapify(heap)
+
+    last_seeder = None
+    current_best = None
+    while len(seeders) < k and len(heap) > 0:
+        _, position, node = heap[0]
+
+        if round_evaluated[node] == len(seeders):
+            heapq.heappop(heap)
+            seeders.append(node)
+            gains.append(gain[node])
+            last_seeder = node
+            current_best = None
+            continue
+
+        if method == "celf++" and last_seeder is not None and previous_best[node] == last_seeder and round_evaluated[node] == len(seeders) - 1:
+            gain[node] = next_gain[node]
+        else:
+            gain[node] = estimator.getGain(seeders, node)
+            if method == "celf++":
+                previous_best[node] = current_best
+                if current_best is not None:
+                    next_gain[node] = estimator.getGain(seeders + [current_best], node)
+        round_evaluated[node] = len(seeders)
+
+        if current_best is None or gain[node] > gain[current_best]:
+            current_best = node
+        heapq.heapreplace(heap, (-gain[node], position, node))
+
+    return seeders, gains
+
+
+def getCandidates(graph, number_of_candidates):
+    """Return the number_of_candidates nodes of highest out-degree, all nodes with out-edges for 0."""
+    degrees = np.diff(graph.indptr)
+    candidates = np.argsort(-degrees, kind='stable')
+    candidates = candidates[degrees[candidates] > 0]
+    if number_of_candidates > 0:
+        candidates = candidates[:number_of_candidates]
+    return candidates.tolist()
+
+
+#%%
+if __name__ == '__main__':
+
+    # Set defaults
+    path = "Data/Digg/"
+    edges_file = "edgesWithTIC.csv"
+    advertisers_file = 'advertisers_diverse.csv'
+    output = "greedy_seeders.csv"
+    k = 50
+    number_of_candidates = 1000
+    iterations = 100
+    seed = 0
+    method = "celf"
+
+    # Parse command line arguments
+    parser = ArgumentParser()
+    parser.add_argument("-p", "--path", default=path)
+    parser.add_argument("-e", "--edges", default=edges_file)
+    parser.add_argument("-a", "--advertisers", default=advertisers_file)
+    parser.add_argument("-d", "--ad", default=None, type=int)
+    parser.add_argument("-o", "--output", default=output)
+    parser.add_argument("-k", "--seeders", default=k, type=int)
+    parser.add_argument("-c", "--candidates", default=number_of_candidates, type=int)
+    parser.add_argument("-i", "--iterations", default=iterations, type=int)
+    parser.add_argument("-r", "--seed", default=seed, type=int)
+    parser.add_argument("-m", "--method", default=method, choices=METHODS)
+
+    args = parser.parse_args()
+
+    graph = loadGraph(args.path + args.edges)
+    print("Edges loaded.")
+
+    # seeders for one ad, or for the mean topic distribution of all ads
+    ad_list = readAds(args.path + args.advertisers)
+    if args.ad is not None:
+        topic_distribution = ad_list[args.ad]
+    else:
+        topic_distribution = np.mean(ad_list, axis=0)
+    print("Ads loaded.")
+
+    candidates = getCandidates(graph, args.candidates)
+    estimator = SpreadEstimator(graph, graph.edgeProbabilities(topic_distribution), args.iterations, args.seed)
+    seeders, gains = selectGreedy(estimator, candidates, args.seeders, args.method)
+
+    with open(args.path + args.output, 'w', newline='') as seeders_file:
+        seeders_writer = csv.writer(seeders_file, delimiter=',')
+        spread = 0.0
+        for seeder, seeder_gain in zip(seeders, gains):
+            spread += seeder_gain
+            seeders_writer.writerow([graph.node_ids[seeder], seeder_gain, spread])
+
+    print("Picked %d seeders from %d candidates with %d spread estimates, %d for plain greedy" % (len(seeders), len(candidates), estimator.evaluations, sum(len(candidates) - index for index in range(len(seeders)))))
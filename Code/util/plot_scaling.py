@@ -70,7 +70,7 @@ df["method"] = df[["weighted", "mode"]].apply(convert_method, axis=1)
 df["setting"] = df[["advertisers", "spread"]].apply(convert_setting, axis=1)
 df["number of advertisers"] = df[["advertisers"]].apply(convert_number_of_advertisers, axis=1)
 df = df[["method", "setting", "number of advertisers", "runtime (seconds)"]]
-df.drop_duplicates(subset=["method", "setting", "number of advertisers"], keep='first', inplace=True)
+df.drop_duplicates(subset=["method", "setting", "number of advertisers"], keep='last', inplace=True)
 df = df.loc[df["setting"] == "random"]
 
 # remove some methods
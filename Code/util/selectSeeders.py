@@ -0,0 +1,74 @@
+#%%
+import heapq
+import random
+import numpy as np
+from argparse import ArgumentParser
+from util.graph import loadGraph
+
+
+#%%
+def getRandomNodes(degrees, k, random_state):
+    """Return k random nodes drawn without replacement from the nodes with out-edges.
+
+    The nodes are drawn by reservoir sampling in node order, in one pass over the degrees.
+    """
+    reservoir = []
+    for number_of_sources, node in enumerate(np.flatnonzero(degrees > 0).tolist()):
+        if number_of_sources < k:
+            reservoir.append(node)
+        else:
+            position = random_state.randrange(number_of_sources + 1)
+            if position < k:
+                reservoir[position] = node
+    return reservoir
+
+
+def getTopNodes(degrees, k):
+    """Return the k nodes of highest out-degree among those with out-edges, ties in node order."""
+    top_nodes = heapq.nlargest(k, range(len(degrees)), key=degrees.__getitem__)
+    return [node for node in top_nodes if degrees[node] > 0]
+
+
+def writeNodes(filename, node_ids, nodes, degrees=None):
+    with open(filename, 'w', newline='') as nodes_file:
+        for node in nodes:
+            if degrees is None:
+                nodes_file.write(node_ids[node] + '\n')
+            else:
+                nodes_file.write(node_ids[node] + ',' + str(degrees[node]) + '\n')
+
+
+#%%
+if __name__ == '__main__':
+
+    # Set defaults
+    path = "Data/Digg/"
+    edges_file = "edgesWithTIC.csv"
+    top_file = "top_seeders.csv"
+    random_file = "random_seeders.csv"
+    degrees_file = "degrees.csv"
+    k = 50
+    seed = 0
+
+    # Parse command line arguments
+    parser = ArgumentParser()
+    parser.add_argument("-p", "--path", default=path)
+    parser.add_argument("-e", "--edges", default=edges_file)
+    parser.add_argument("-k", "--seeders", default=k, type=int)
+    parser.add_argument("-r", "--seed", default=seed, type=int)
+    parser.add_argument("-t", "--top", default=top_file)
+    parser.add_argument("-n", "--random", default=random_file)
+    parser.add_argument("-d", "--degrees", default=degrees_file)
+
+    args = parser.parse_args()
+
+    graph = loadGraph(args.path + args.edges)
+    degrees = np.diff(graph.indptr)
+    print("Edges loaded.")
+
+    # all nodes with out-edges by decreasing out-degree
+    writeNodes(args.path + args.degrees, graph.node_ids, getTopNodes(degrees, len(degrees)), degrees)
+    writeNodes(args.path + args.top, graph.node_ids, getTopNodes(degrees, args.seeders))
+    writeNodes(args.path + args.random, graph.node_ids, getRandomNodes(degrees, args.seeders, random.Random(args.seed)))
+
+    print("Wrote %s, %s and %s to %s" % (args.degrees, args.top, args.random, args.path))
@@ -1,109 +1,512 @@
 #%%
+import os
 import csv
-import random
-import ast
+import concurrent.futures
+import numpy as np
+from statistics import NormalDist
+from multiprocessing import shared_memory
+from argparse import ArgumentParser
+from util.graph import Graph
+from util.graph import loadGraph
 
-#%%
-path = "Data/Digg/"
-#path = "Data/Flixster/"
-seeders_file = "random_seeders.csv"
-#seeders_file = "top_seeders.csv"
-suffix = "_random_diverse"
-#advertisers_file = 'advertisers.csv'
-advertisers_file = 'advertisers_diverse.csv'
-ad_start = 0
-seeder_start = 0
-iterations = 10
+# Arrays of a Graph, shared with the worker processes
+GRAPH_ARRAYS = ("indptr", "indices", "topic_probabilities")
 
-#%%
-tic_dict = {}
-with open(path + 'edgesWithTIC.csv', 'r') as tic_file:
-    tic_reader = csv.reader(tic_file, delimiter=',')
-    next(tic_reader, None)  # skip the headers
-
-    for row in tic_reader: 
-        node1 = row[0]
-        node2 = row[1]
-        distribution = ast.literal_eval(row[2])
-        if node1 in tic_dict:
-            tic_dict[node1].append([node2, distribution])
-        else:
-            tic_dict[node1] = [[node2, distribution]]
-
-print("Edges loaded.")
+# Simulation modes: independent cascades per (ad, seeder) pair, live-edge worlds shared by all ads, or the same
+# worlds simulated for all seeders of an ad at once
+MODES = ["cascades", "worlds", "bitparallel"]
 
-#%%
-seeders_list = []
-with open(path + seeders_file, 'r') as seeders_file:
-    seeders_reader = csv.reader(seeders_file, delimiter=',')
+# Modes following the independent cascade model, where every edge gets its own activation attempt; the cascades
+# mode gives every node a single attempt, from the first edge reaching it, so the estimates differ
+LIVE_EDGE_MODES = ["worlds", "bitparallel"]
 
-    for row in seeders_reader: 
-        seeders_list.append(row[0])
+# Edges whose live masks are computed at once, bounding the edge x ad probabilities held in memory
+EDGE_CHUNK = 65536
 
-print("Nodes loaded.")
 
 #%%
-ad_list = []
-with open(path + advertisers_file, 'r') as ad_file:
-    ad_reader = csv.reader(ad_file, delimiter=',')
+def getInfluence(graph, edge_probabilities, start_node, random_state):
+    """Return the number of nodes one cascade from start_node activates, start_node not counted.
 
-    for row in ad_reader:
-        ad_list.append(row)
+    start_node may also be an array of nodes seeding the cascade together. The cascade is expanded one
+    frontier at a time. As in a breadth-first search over the edge lists, every node gets a single
+    activation attempt, from the first edge that reaches it.
+    """
+    visited = np.zeros(len(graph.indptr) - 1, dtype=bool)
+    visited[start_node] = True
+    frontier = np.atleast_1d(np.asarray(start_node))
+    count = 0
 
-print("Ads loaded.")
+    while len(frontier) > 0:
+        # out-edges of all frontier nodes, in frontier order
+        starts = graph.indptr[frontier]
+        lengths = graph.indptr[frontier + 1] - starts
+        offsets = np.cumsum(lengths) - lengths
+        edges = np.arange(lengths.sum()) - np.repeat(offsets - starts, lengths)
+        targets = graph.indices[edges]
 
-#%%
-def getInfluence(start_node, topic_dist):
-    count = 0
-    visited = set()
-    visited.add(start_node)
-    fringe = [start_node]
+        unvisited = ~visited[targets]
+        edges = edges[unvisited]
+        targets = targets[unvisited]
 
-    while fringe:
-        current_fringe = fringe
-        fringe = []
+        # only the first edge reaching a target tries to activate it
+        _, first = np.unique(targets, return_index=True)
+        first.sort()
+        edges = edges[first]
+        targets = targets[first]
+        visited[targets] = True
 
-        for node in current_fringe:
+        frontier = targets[random_state.random_sample(len(edges)) <= edge_probabilities[edges]]
+        count += len(frontier)
 
-            if str(node) in tic_dict:
+    return count
 
-                for target_list in tic_dict[str(node)]:
-                    target_node = target_list[0]
-                    target_probabilities = target_list[1]
 
-                    if target_node not in visited:
-                        dice = random.random()
-                        
-                        probability = sum([float(topic_dist[i]) * float(target_probabilities[i]) for i in range(len(topic_dist))])
+def getStandardErrors(totals, squares, samples):
+    """Return the standard errors of the means of samples values with the given sums and sums of squares, 0 without samples."""
+    samples = np.maximum(samples, 1)
+    variances = np.maximum(0.0, (squares - totals * totals / samples) / np.maximum(samples - 1, 1))
+    return np.sqrt(variances / samples)
 
-                        if dice <= probability:
-                            fringe.append(target_node)
-                            count += 1
 
-                        visited.add(target_node)
+class StoppingRule(object):
+    """Stops sampling once z standard errors are within relative_error of every mean, or after max_iterations samples.
+
+    z is 1 for a target on the relative standard error and the normal quantile of confidence for a target on
+    the relative half-width of a confidence interval. Without a relative_error, sampling stops after
+    max_iterations samples.
+    """
+    def __init__(self, relative_error, max_iterations, confidence=None):
+        self.relative_error = relative_error
+        self.max_iterations = max_iterations
+        self.z = 1.0
+        if confidence is not None:
+            self.z = NormalDist().inv_cdf((1 + confidence) / 2)
+
+    def isMet(self, totals, squares, samples):
+        """Return for every mean whether sampling it can stop, elementwise over arrays."""
+        met = np.asarray(samples) >= self.max_iterations
+        if self.relative_error is None:
+            return met
+        precise = self.z * getStandardErrors(totals, squares, samples) <= self.relative_error * totals / np.maximum(samples, 1)
+        return met | (precise & (np.asarray(samples) >= 2))
+
+
+def simulateInfluence(graph, edge_probabilities, start_node, iterations, random_state, stopping_rule=None):
+    """Return the mean and standard error of the number of nodes activated by start_node, and the number of cascades.
+
+    Cascades are run in rounds of iterations until stopping_rule is met, a single round without one. A start_node
+    of -1, or a stopping_rule allowing no cascade, gives a spread of 0 from 0 cascades.
+    """
+    if start_node < 0:
+        return 0.0, 0.0, 0
+    total = 0
+    squares = 0
+    samples = 0
+    while True:
+        for _ in range(iterations if stopping_rule is None else min(iterations, stopping_rule.max_iterations - samples)):
+            count = getInfluence(graph, edge_probabilities, start_node, random_state)
+            total += count
+            squares += count * count
+            samples += 1
+        if stopping_rule is None or stopping_rule.isMet(total, squares, samples):
+            break
+    if samples == 0:
+        return 0.0, 0.0, 0
+    return total * 1.0 / samples, float(getStandardErrors(total, squares, samples)), samples
+
+
+def getLiveMasks(graph, ads, thresholds):
+    """Return for every edge the bitmask of the ads it is live for, as an (edges, words) array of uint64.
+
+    An edge is live for an ad if its threshold is below the ad's activation probability of the edge, bit
+    64 * w + b of word w standing for ads[64 * w + b].
+    """
+    ads = np.asarray(ads, dtype=np.float64)
+    words = (len(ads) + 63) // 64
+    masks = np.zeros((len(thresholds), words * 8), dtype=np.uint8)
+    for start in range(0, len(thresholds), EDGE_CHUNK):
+        end = min(start + EDGE_CHUNK, len(thresholds))
+        live = thresholds[start:end, None] < graph.topic_probabilities[start:end] @ ads.T
+        packed = np.packbits(live, axis=1, bitorder='little')
+        masks[start:end, :packed.shape[1]] = packed
+    return masks.view('<u8')
+
+
+def propagateMasks(indptr, indices, start_nodes, start_masks, edge_masks=None):
+    """Return the bitmask of every node, with bit i set if the node is reached by bit i.
+
+    Bit i starts at the start nodes whose start_masks have it set and spreads along the edges whose
+    edge_masks have it set, along all edges if edge_masks is None. Every bit is one traversal of the
+    live edges; all of them are expanded together, one frontier at a time.
+    """
+    reached = np.zeros((len(indptr) - 1, start_masks.shape[1]), dtype=np.uint64)
+    np.bitwise_or.at(reached, start_nodes, start_masks)
+    frontier = np.unique(start_nodes)
+    gained = reached[frontier]
+
+    while len(frontier) > 0:
+        # out-edges of all frontier nodes, with the bits their source gained
+        starts = indptr[frontier]
+        lengths = indptr[frontier + 1] - starts
+        offsets = np.cumsum(lengths) - lengths
+        edges = np.arange(lengths.sum()) - np.repeat(offsets - starts, lengths)
+        bits = np.repeat(gained, lengths, axis=0)
+        if edge_masks is not None:
+            bits &= edge_masks[edges]
+            live = bits.any(axis=1)
+            bits = bits[live]
+            edges = edges[live]
+        targets = indices[edges]
+        if len(targets) == 0:
+            break
+
+        # the bits arriving at every target, without those it already has
+        order = np.argsort(targets)
+        targets = targets[order]
+        first = np.flatnonzero(np.concatenate(([True], targets[1:] != targets[:-1])))
+        targets = targets[first]
+        bits = np.bitwise_or.reduceat(bits[order], first, axis=0) & ~reached[targets]
+
+        new = bits.any(axis=1)
+        frontier = targets[new]
+        gained = bits[new]
+        reached[frontier] |= gained
+
+    return reached
+
+
+def countBits(masks, number_of_bits):
+    """Return for each of the first number_of_bits bits the number of rows of masks that have it set."""
+    return np.unpackbits(masks.view(np.uint8), axis=1, bitorder='little')[:, :number_of_bits].sum(axis=0)
+
+
+def getWorldRandomState(seed, world):
+    # the thresholds of a world are shared by all ads and seeders, so they only depend on the world
+    return np.random.RandomState(np.random.Philox(np.random.SeedSequence(seed, spawn_key=(world,))))
+
+
+def simulateWorlds(graph, ad_list, start_nodes, iterations, seed, stopping_rule=None):
+    """Return the means and standard errors of the number of nodes activated by every start node for every ad, as
+    (ads, start nodes) arrays, and the number of worlds of every start node.
+
+    Every world draws one uniform threshold per edge, and an edge is live for an ad if its threshold is
+    below the ad's activation probability. The ads share the worlds, so their spreads are compared on
+    common random numbers, and all distinct ads are simulated by one traversal per world and start node.
+    As in the independent cascade model, every edge gets its own activation attempt. A start node runs
+    worlds 0, 1, ... in rounds of iterations until stopping_rule is met for all ads, so its estimates do
+    not depend on the other start nodes. Start nodes of -1 have a spread of 0 from 0 worlds.
+    """
+    unique_ads, ad_columns = np.unique(np.asarray(ad_list, dtype=np.float64), axis=0, return_inverse=True)
+    all_ads = np.zeros((1, (len(unique_ads) + 63) // 64), dtype=np.uint64)
+    all_ads.view(np.uint8)[0, :(len(unique_ads) + 7) // 8] = np.packbits(np.ones(len(unique_ads), dtype=bool), bitorder='little')
+
+    totals = np.zeros((len(unique_ads), len(start_nodes)))
+    squares = np.zeros((len(unique_ads), len(start_nodes)))
+    samples = np.zeros(len(start_nodes), dtype=np.int64)
+    active = np.asarray(start_nodes) >= 0
+    world = 0
+    while active.any():
+        for _ in range(iterations if stopping_rule is None else min(iterations, stopping_rule.max_iterations - samples[active].max())):
+            thresholds = getWorldRandomState(seed, world).random_sample(len(graph.indices))
+            edge_masks = getLiveMasks(graph, unique_ads, thresholds)
+            for column in np.flatnonzero(active):
+                reached = propagateMasks(graph.indptr, graph.indices, [start_nodes[column]], all_ads, edge_masks)
+                counts = countBits(reached, len(unique_ads)) - 1
+                totals[:, column] += counts
+                squares[:, column] += counts * counts
+            samples += active
+            world += 1
+        if stopping_rule is None:
+            break
+        active &= ~np.all(stopping_rule.isMet(totals, squares, samples), axis=0)
+
+    ad_columns = ad_columns.reshape(-1)
+    return totals[ad_columns] / np.maximum(samples, 1), getStandardErrors(totals, squares, samples)[ad_columns], samples
+
+
+def getLiveGraph(graph, edge_probabilities, thresholds):
+    """Return the CSR arrays (indptr, indices) of the edges of graph whose threshold is below their probability."""
+    live = thresholds < edge_probabilities
+    live_before = np.concatenate(([0], np.cumsum(live)))
+    return live_before[graph.indptr], graph.indices[live]
+
+
+def getStartMasks(number_of_start_nodes):
+    """Return start masks giving start node i bit i."""
+    bits = np.arange(number_of_start_nodes)
+    masks = np.zeros((number_of_start_nodes, (number_of_start_nodes + 63) // 64), dtype=np.uint64)
+    masks[bits, bits // 64] = np.left_shift(np.uint64(1), (bits % 64).astype(np.uint64))
+    return masks
+
+
+def simulateSeeders(graph, edge_probabilities, start_nodes, iterations, seed, stopping_rule=None):
+    """Return the means and standard errors of the number of nodes activated by every start node, not counting
+    itself, and the number of worlds of every start node.
+
+    The worlds are those of simulateWorlds. Each world is reduced to its live edges, and start node i
+    spreads bit i over them, so one traversal per world yields the spreads of all start nodes still
+    sampling. A start node runs worlds 0, 1, ... in rounds of iterations until stopping_rule is met for it.
+    Start nodes of -1 have a spread of 0 from 0 worlds.
+    """
+    start_nodes = np.asarray(start_nodes)
+    start_masks = getStartMasks(len(start_nodes))
+    totals = np.zeros(len(start_nodes))
+    squares = np.zeros(len(start_nodes))
+    samples = np.zeros(len(start_nodes), dtype=np.int64)
+    active = start_nodes >= 0
+    world = 0
+    while active.any():
+        for _ in range(iterations if stopping_rule is None else min(iterations, stopping_rule.max_iterations - samples[active].max())):
+            thresholds = getWorldRandomState(seed, world).random_sample(len(graph.indices))
+            indptr, indices = getLiveGraph(graph, edge_probabilities, thresholds)
+            reached = propagateMasks(indptr, indices, start_nodes[active], start_masks[active])
+            counts = countBits(reached, len(start_nodes)) - active
+            totals += counts
+            squares += counts * counts
+            samples += active
+            world += 1
+        if stopping_rule is None:
+            break
+        active &= ~stopping_rule.isMet(totals, squares, samples)
+
+    return totals / np.maximum(samples, 1), getStandardErrors(totals, squares, samples), samples
+
+
+def getRandomState(seed, advertiser, seeder):
+    # a counter-based stream per (ad, seeder) pair, so an estimate does not depend on which worker computes it or when
+    return np.random.RandomState(np.random.Philox(np.random.SeedSequence(seed, spawn_key=(advertiser, seeder))))
+
+
+def shareGraph(graph):
+    """Copy the arrays of graph to shared memory and return the blocks and a description workers attach to."""
+    blocks = []
+    description = []
+    for name in GRAPH_ARRAYS:
+        array = getattr(graph, name)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        description.append((block.name, array.shape, array.dtype.str))
+    return blocks, description
+
+
+def attachGraph(description):
+    """Return the blocks and a Graph on the shared arrays of a description from shareGraph, without node ids."""
+    blocks = [shared_memory.SharedMemory(name=name) for name, _, _ in description]
+    arrays = [np.ndarray(shape, dtype=dtype, buffer=block.buf) for block, (_, shape, dtype) in zip(blocks, description)]
+    return blocks, Graph([], *arrays)
+
+
+def readDone(filename):
+    """Return the (ad, seeder) pairs already in an output file.
+
+    A last row cut off by an interrupted run is removed from the file, so it is simulated again.
+    """
+    done = set()
+    if not os.path.exists(filename):
+        return done
+    with open(filename, 'rb+') as influence_file:
+        content = influence_file.read()
+        complete = content.rfind(b"\n") + 1
+        if complete < len(content):
+            influence_file.truncate(complete)
+    for row in csv.reader(content[:complete].decode().splitlines(), delimiter=','):
+        if row:
+            done.add((int(row[0]), row[1]))
+    return done
+
+
+def getBatches(ad_list, seeders_list, done, batch_size, mode):
+    """Return the pairs still to simulate as batches (ad, [(seeder position, seeder), ...]).
+
+    A batch of the cascades and bitparallel modes holds pairs of one ad; a batch of the worlds mode holds
+    seeders, to be simulated for all ads, and has an ad of None.
+    """
+    batches = []
+    if mode == "worlds":
+        pairs = [(position, seeder) for position, seeder in enumerate(seeders_list) if any((index, seeder) not in done for index in range(len(ad_list)))]
+        for start in range(0, len(pairs), batch_size):
+            batches.append((None, pairs[start:start + batch_size]))
+        return batches
+    for index in range(len(ad_list)):
+        pairs = [(position, seeder) for position, seeder in enumerate(seeders_list) if (index, seeder) not in done]
+        for start in range(0, len(pairs), batch_size):
+            batches.append((index, pairs[start:start + batch_size]))
+    return batches
+
+
+def getRow(index, seeder, mean, standard_error, samples, stopping_rule):
+    # the standard error and number of samples are only written by adaptive runs, loadData reads the first three columns
+    if stopping_rule is None:
+        return [index, seeder, mean]
+    return [index, seeder, mean, standard_error, samples]
+
+
+def runBatch(graph, start_nodes, ad_list, batch, iterations, seed, mode, stopping_rule=None):
+    index, pairs = batch
+    rows = []
+    if mode == "worlds":
+        means, standard_errors, samples = simulateWorlds(graph, ad_list, [start_nodes[position] for position, _ in pairs], iterations, seed, stopping_rule)
+        for column, (position, seeder) in enumerate(pairs):
+            rows.extend(getRow(ad, seeder, means[ad, column], standard_errors[ad, column], samples[column], stopping_rule) for ad in range(len(ad_list)))
+        return rows
+    # activation probabilities of all edges for this ad, computed once per batch
+    edge_probabilities = graph.edgeProbabilities(ad_list[index])
+    if mode == "bitparallel":
+        means, standard_errors, samples = simulateSeeders(graph, edge_probabilities, [start_nodes[position] for position, _ in pairs], iterations, seed, stopping_rule)
+        return [getRow(index, seeder, means[column], standard_errors[column], samples[column], stopping_rule) for column, (_, seeder) in enumerate(pairs)]
+    for position, seeder in pairs:
+        mean, standard_error, samples = simulateInfluence(graph, edge_probabilities, start_nodes[position], iterations, getRandomState(seed, index, position), stopping_rule)
+        rows.append(getRow(index, seeder, mean, standard_error, samples, stopping_rule))
+    return rows
+
+
+# Graph and inputs shared by all batches of a worker process, set once by the pool initializer
+worker_blocks = None
+worker_arguments = None
+
+
+def initializeWorker(description, start_nodes, ad_list, iterations, seed, mode, stopping_rule):
+    global worker_blocks, worker_arguments
+    worker_blocks, graph = attachGraph(description)
+    worker_arguments = (graph, start_nodes, ad_list, iterations, seed, mode, stopping_rule)
+
+
+def runWorkerBatch(batch):
+    graph, start_nodes, ad_list, iterations, seed, mode, stopping_rule = worker_arguments
+    return runBatch(graph, start_nodes, ad_list, batch, iterations, seed, mode, stopping_rule)
+
+
+def simulateAll(graph, seeders_list, ad_list, output, iterations, seed, workers=1, batch_size=10, mode="cascades", stopping_rule=None):
+    """Simulate the influence of every (ad, seeder) pair and append the rows index,seeder,influence to output.
+
+    Pairs already in output are skipped, so an interrupted run continues where it stopped. The pairs
+    are simulated in batches, by workers processes sharing the graph, and every batch is written as
+    soon as it and all batches before it are done. In the cascades mode each pair draws from its own
+    random stream, in the worlds and bitparallel modes each world does, so the estimates are the same
+    for any number of workers. With a stopping_rule, every pair is simulated in rounds of iterations
+    until the rule is met and its standard error and number of samples are written as well; in the worlds
+    mode a seeder samples until the rule is met for all ads.
+    """
+    done = readDone(output)
+    batches = getBatches(ad_list, seeders_list, done, batch_size, mode)
+    start_nodes = [graph.node_index.get(seeder, -1) for seeder in seeders_list]
+
+    blocks = []
+    if workers > 1:
+        blocks, description = shareGraph(graph)
+        executor = concurrent.futures.ProcessPoolExecutor(workers, initializer=initializeWorker, initargs=(description, start_nodes, ad_list, iterations, seed, mode, stopping_rule))
+        results = executor.map(runWorkerBatch, batches)
+    else:
+        executor = None
+        results = (runBatch(graph, start_nodes, ad_list, batch, iterations, seed, mode, stopping_rule) for batch in batches)
+
+    try:
+        with open(output, 'a', newline='') as influence_file:
+            influence_writer = csv.writer(influence_file, delimiter=',')
+            for rows in results:
+                influence_writer.writerows(row for row in rows if (row[0], row[1]) not in done)
+                influence_file.flush()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def getOutputName(path, iterations, relative_error, suffix, mode):
+    """Return the default output file of a simulation, marked _liveedge for the modes of the independent cascade model."""
+    model = "_liveedge" if mode in LIVE_EDGE_MODES else ""
+    if relative_error is not None:
+        return path + 'influence_error=' + str(relative_error) + model + suffix + '.csv'
+    return path + 'influence_' + str(iterations) + '_iterations' + model + suffix + '.csv'
+
+
+def readSeeders(filename):
+    seeders_list = []
+    with open(filename, 'r') as seeders_file:
+        seeders_reader = csv.reader(seeders_file, delimiter=',')
+
+        for row in seeders_reader:
+            seeders_list.append(row[0])
+    return seeders_list
+
+
+def readAds(filename):
+    ad_list = []
+    with open(filename, 'r') as ad_file:
+        ad_reader = csv.reader(ad_file, delimiter=',')
+
+        for row in ad_reader:
+            ad_list.append([float(value) for value in row])
+    return ad_list
 
-    return count
 
 #%%
+if __name__ == '__main__':
+
+    # Set defaults
+    path = "Data/Digg/"
+    #path = "Data/Flixster/"
+    edges_file = "edgesWithTIC.csv"
+    seeders_file = "random_seeders.csv"
+    #seeders_file = "top_seeders.csv"
+    suffix = "_random_diverse"
+    #advertisers_file = 'advertisers.csv'
+    advertisers_file = 'advertisers_diverse.csv'
+    iterations = 10
+    seed = 0
+    workers = 1
+    batch_size = 10
+    mode = "cascades"
+    max_iterations = 10000
+
+    # Parse command line arguments
+    parser = ArgumentParser()
+    parser.add_argument("-p", "--path", default=path)
+    parser.add_argument("-e", "--edges", default=edges_file)
+    parser.add_argument("-s", "--seeders", default=seeders_file)
+    parser.add_argument("-a", "--advertisers", default=advertisers_file)
+    parser.add_argument("-x", "--suffix", default=suffix)
+    parser.add_argument("-o", "--output", default=None)
+    parser.add_argument("-i", "--iterations", default=iterations, type=int)
+    parser.add_argument("-r", "--seed", default=seed, type=int)
+    parser.add_argument("-j", "--workers", default=workers, type=int)
+    parser.add_argument("-b", "--batch", default=batch_size, type=int)
+    parser.add_argument("-m", "--mode", default=mode, choices=MODES)
+    parser.add_argument("-t", "--relativeerror", default=None, type=float)
+    parser.add_argument("-c", "--confidence", default=None, type=float)
+    parser.add_argument("--maxiterations", default=max_iterations, type=int)
+
+    args = parser.parse_args()
 
-with open(path + 'influence_' + str(iterations) + '_iterations' + suffix + '.csv', 'a', newline='') as influence_file:
-    influence_writer = csv.writer(influence_file, delimiter=',')
+    if args.iterations < 1:
+        parser.error("--iterations must be at least 1")
+    if args.maxiterations < 1:
+        parser.error("--maxiterations must be at least 1")
+    if args.confidence is not None and args.relativeerror is None:
+        parser.error("-c/--confidence needs a relative error target (-t)")
 
-    for index in range(ad_start, len(ad_list)):
+    output = args.output
+    if output is None:
+        output = getOutputName(args.path, args.iterations, args.relativeerror, args.suffix, args.mode)
 
-        topic_dist = ad_list[index]
-    
-        for seeder in seeders_list[seeder_start:]:
+    graph = loadGraph(args.path + args.edges)
+    print("Edges loaded.")
 
-            total = 0
-            for i in range(iterations):
-                total += getInfluence(seeder, topic_dist)
+    seeders_list = readSeeders(args.path + args.seeders)
+    print("Nodes loaded.")
 
-            count = total * 1.0 / iterations
+    ad_list = readAds(args.path + args.advertisers)
+    print("Ads loaded.")
 
-            influence_writer.writerow([index, seeder, count])
-            influence_file.flush()
+    # with a target error, -i is the number of samples added per round
+    stopping_rule = None
+    if args.relativeerror is not None:
+        stopping_rule = StoppingRule(args.relativeerror, args.maxiterations, args.confidence)
 
-        seeder_start = 0
+    simulateAll(graph, seeders_list, ad_list, output, args.iterations, args.seed, args.workers, args.batch, args.mode, stopping_rule)
 
-print("Done.")
+    print("Done.")